@@ -0,0 +1,78 @@
+import argparse
+import collections
+import pkgutil
+import subprocess
+import sys
+
+PACKAGE_NAME = "lambda_utility"
+TOP_PACKAGES = 5
+
+
+def find_modules() -> list:
+    import lambda_utility
+
+    return [
+        f"{PACKAGE_NAME}.{module.name}"
+        for module in pkgutil.iter_modules(lambda_utility.__path__)
+    ]
+
+
+def run_importtime(statement: str) -> dict:
+    """Returns `{module: self time [us]}` reported by `python -X importtime`"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    )
+    result = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, _, name = line[len("import time:") :].split("|")
+        result[name.strip()] = int(self_us)
+
+    return result
+
+
+def measure(module: str, startup: dict) -> tuple:
+    """Returns the total time and the time per top-level package in microseconds"""
+    imported = run_importtime(f"import {module}")
+    packages = collections.Counter()
+    for name, self_us in imported.items():
+        if name not in startup:
+            packages[name.split(".")[0]] += self_us
+
+    return sum(packages.values()), packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the import time per module")
+    parser.add_argument(
+        "modules",
+        nargs="*",
+        help=f"modules to measure (default: every module in {PACKAGE_NAME!r})",
+    )
+    parser.add_argument(
+        "-n",
+        "--top",
+        type=int,
+        help=f"number of the slowest packages to show (default: {TOP_PACKAGES})",
+        default=TOP_PACKAGES,
+    )
+    arguments = parser.parse_args()
+    modules = arguments.modules or find_modules()
+
+    # modules already imported by the interpreter itself are not counted
+    startup = run_importtime("pass")
+    for module in modules:
+        total_us, packages = measure(module, startup)
+        print(f"{module:<32} {total_us / 1000:>9.1f} ms")
+        for package, self_us in packages.most_common(arguments.top):
+            print(f"    {package:<28} {self_us / 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
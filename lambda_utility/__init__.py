@@ -1,14 +1,56 @@
-from lambda_utility import function
-from lambda_utility import image
-from lambda_utility import mp
-from lambda_utility import path
-from lambda_utility import process
-from lambda_utility import s3storage
-from lambda_utility import schema
-from lambda_utility import session
-from lambda_utility import sqs
-from lambda_utility import typedefs
-from lambda_utility import utils
-from lambda_utility import zipper
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from lambda_utility import cache
+    from lambda_utility import function
+    from lambda_utility import image
+    from lambda_utility import mp
+    from lambda_utility import offload
+    from lambda_utility import path
+    from lambda_utility import process
+    from lambda_utility import s3storage
+    from lambda_utility import schema
+    from lambda_utility import session
+    from lambda_utility import spool
+    from lambda_utility import sqs
+    from lambda_utility import typedefs
+    from lambda_utility import utils
+    from lambda_utility import zipper
 
 __version__ = "1.14.0"
+
+# submodules are imported on first attribute access (PEP 562),
+# so that a function only pays for the modules it actually uses
+_SUBMODULES = frozenset(
+    (
+        "cache",
+        "function",
+        "image",
+        "mp",
+        "offload",
+        "path",
+        "process",
+        "s3storage",
+        "schema",
+        "session",
+        "spool",
+        "sqs",
+        "typedefs",
+        "utils",
+        "zipper",
+    )
+)
+
+
+def __getattr__(name: str) -> Any:
+    if name in _SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_SUBMODULES})
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+__all__ = (
+    "CacheEntry",
+    "ObjectCache",
+)
+
+import collections
+import dataclasses
+import hashlib
+import os
+import pathlib
+import shutil
+import tempfile
+import time
+from typing import Any, Optional, Dict
+
+from lambda_utility.typedefs import PathLike
+
+MB = 1024 * 1024
+DEFAULT_DIRECTORY = "/tmp/lambda-utility-cache"
+DEFAULT_MAX_SIZE = 256 * MB
+DEFAULT_TTL = 60.0
+
+CacheKey = tuple
+
+
+@dataclasses.dataclass
+class CacheEntry:
+    path: pathlib.Path
+    e_tag: str
+    size: int
+    content_type: str
+    metadata: Dict[str, str]
+    response_metadata: Dict[str, Any]
+    validated_at: float
+
+
+class ObjectCache:
+    """Size-bounded LRU cache of objects on the local disk (`/tmp`).
+
+    An entry younger than `ttl` seconds is used as it is; an older one is
+    revalidated by the caller (e.g. a conditional GET with its ETag).
+    The index lives in memory, so entries last as long as the process.
+    """
+
+    __slots__ = (
+        "directory",
+        "max_size",
+        "ttl",
+        "hits",
+        "revalidations",
+        "misses",
+        "_entries",
+        "_size",
+    )
+    directory: pathlib.Path
+    max_size: int
+    ttl: float
+    hits: int
+    revalidations: int
+    misses: int
+    _entries: collections.OrderedDict[CacheKey, CacheEntry]
+    _size: int
+
+    def __init__(
+        self,
+        directory: PathLike = DEFAULT_DIRECTORY,
+        *,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl: float = DEFAULT_TTL,
+    ):
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, cache_key: CacheKey) -> Optional[CacheEntry]:
+        entry = self._entries.get(cache_key)
+        if entry is not None:
+            self._entries.move_to_end(cache_key)
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.monotonic() - entry.validated_at < self.ttl
+
+    def mark_hit(self) -> None:
+        self.hits += 1
+
+    def mark_revalidated(self, entry: CacheEntry) -> None:
+        self.revalidations += 1
+        entry.validated_at = time.monotonic()
+
+    def temporary_path(self) -> pathlib.Path:
+        """Returns a new file in the cache directory to be passed to `put`"""
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        os.close(fd)
+        return pathlib.Path(path)
+
+    def put(
+        self,
+        cache_key: CacheKey,
+        temporary_path: pathlib.Path,
+        *,
+        e_tag: str,
+        content_type: str,
+        metadata: Dict[str, str],
+        response_metadata: Dict[str, Any],
+    ) -> CacheEntry:
+        self.misses += 1
+        path = self.directory / hashlib.sha256(repr(cache_key).encode()).hexdigest()
+        os.replace(temporary_path, path)
+
+        previous = self._entries.pop(cache_key, None)
+        if previous is not None:
+            self._size -= previous.size
+
+        entry = CacheEntry(
+            path=path,
+            e_tag=e_tag,
+            size=path.stat().st_size,
+            content_type=content_type,
+            metadata=metadata,
+            response_metadata=response_metadata,
+            validated_at=time.monotonic(),
+        )
+        self._entries[cache_key] = entry
+        self._size += entry.size
+        self._evict()
+        return entry
+
+    def discard(self, cache_key: CacheKey) -> None:
+        entry = self._entries.pop(cache_key, None)
+        if entry is not None:
+            self._size -= entry.size
+            entry.path.unlink()
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _evict(self) -> None:
+        # the newest entry is kept even when it alone exceeds `max_size`
+        while self._size > self.max_size and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self._size -= entry.size
+            entry.path.unlink()
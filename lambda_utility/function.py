@@ -1,37 +1,189 @@
 from __future__ import annotations
 
-__all__ = ("invoke",)
+__all__ = (
+    "LambdaFunctionError",
+    "InvocationCache",
+    "invoke",
+    "InvocationResult",
+    "invoke_many",
+)
 
-from typing import Optional, Literal, Union, BinaryIO, Dict
-
-import aiobotocore
-import botocore.client
+import asyncio
+import collections
+import dataclasses
+import functools
+import hashlib
+import random
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Optional,
+    Literal,
+    Union,
+    BinaryIO,
+    Dict,
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+)
 
+from lambda_utility.offload import LAMBDA_EVENT_PAYLOAD_LIMIT, LAMBDA_PAYLOAD_LIMIT
 from lambda_utility.schema import LambdaInvocationResponse
-from lambda_utility.session import create_client
+from lambda_utility.session import (
+    AioClientContext,
+    PooledClientContext,
+    SharedClientContext,
+    pooled_client,
+)
+from lambda_utility.utils import concurrent_map, to_async_iterator
+
+if TYPE_CHECKING:
+    import botocore.client
+
+    from lambda_utility.offload import PayloadOffload
 
 
 class LambdaFunctionError(Exception):
-    pass
+    """The function raised an error. Raised by `invoke` with the `response`,
+    whose payload is only parsed when the message is needed.
+    """
+
+    def __init__(self, *args: Any, response: Optional[LambdaInvocationResponse] = None):
+        super().__init__(*args)
+        self.response = response
+
+    def __str__(self) -> str:
+        if not self.args and self.response is not None:
+            return str(self.response.payload)
+        return super().__str__()
 
 
 def _is_success_response(header: Dict) -> bool:
     return "x-amz-function-error" not in header
 
 
+DEFAULT_CACHE_TTL = 60.0
+DEFAULT_CACHE_MAX_SIZE = 1024
+
+
+class InvocationCache:
+    """Opt-in cache of synchronous invocation results, for pure functions.
+
+    Results are keyed by the function name, qualifier, log type and a hash
+    of the payload, kept for `ttl` seconds and evicted least recently used
+    beyond `max_size` entries. Concurrent identical invocations on a pooled
+    client share one call.
+    Only successful `RequestResponse` invocations are cached, and a cached
+    response is shared between callers, so do not modify its payload.
+    :example:
+        probe_cache = InvocationCache(ttl=30)
+        result = await invoke("probe", "RequestResponse", payload, cache=probe_cache)
+    """
+
+    __slots__ = (
+        "ttl",
+        "max_size",
+        "hits",
+        "misses",
+        "_entries",
+        "_in_flight",
+    )
+    ttl: float
+    max_size: int
+    hits: int
+    misses: int
+    _entries: collections.OrderedDict[tuple, tuple[float, LambdaInvocationResponse]]
+    _in_flight: dict[tuple, asyncio.Task]
+
+    def __init__(
+        self, ttl: float = DEFAULT_CACHE_TTL, max_size: int = DEFAULT_CACHE_MAX_SIZE
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._in_flight = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def _get_or_invoke(
+        self,
+        key: tuple,
+        call: Callable[[], Awaitable[LambdaInvocationResponse]],
+        shared: bool,
+    ) -> LambdaInvocationResponse:
+        cached = self._entries.get(key)
+        if cached is not None:
+            if cached[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+            del self._entries[key]
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.hits += 1
+            # a cancelled caller must not cancel the call the others are waiting for
+            return await asyncio.shield(task)
+
+        self.misses += 1
+        if not shared:
+            # the client of the caller closes with it, so the call is not shared
+            result = await call()
+            self._put(key, result)
+            return result
+
+        task = asyncio.ensure_future(call())
+        self._in_flight[key] = task
+        task.add_done_callback(functools.partial(self._on_done, key))
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: tuple, task: asyncio.Task) -> None:
+        del self._in_flight[key]
+        if not task.cancelled() and task.exception() is None:
+            self._put(key, task.result())
+
+    def _put(self, key: tuple, result: LambdaInvocationResponse) -> None:
+        if self.ttl <= 0 or not _is_success_response(
+            result.response_metadata.http_headers
+        ):
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
 async def invoke(
     function_name: str,
     invocation_type: Literal["Event", "RequestResponse", "DryRun"],
     payload: Union[bytes, BinaryIO],
     log_type: Literal["None", "Tail"] = "None",
     *,
-    client: Optional[aiobotocore.session.ClientCreatorContext] = None,
+    qualifier: Optional[str] = None,
+    client: Optional[AioClientContext] = None,
     config: Optional[botocore.client.Config] = None,
     raise_function_error: bool = True,
+    offload: Optional[PayloadOffload] = None,
+    cache: Optional[InvocationCache] = None,
 ) -> LambdaInvocationResponse:
     """Invokes a Lambda function.
     You can invoke a function synchronously (and wait for the response),
     or asynchronously. To invoke a function asynchronously, set InvocationType to Event.
+    With `offload`, a large payload is compressed or moved to S3 and the response
+    payload is restored (see `PayloadOffload`); the function decodes its event
+    with `PayloadOffload.decode_object` and may encode its result with `encode_object`.
+    With `cache`, a `RequestResponse` result is reused for the same function,
+    qualifier and payload (see `InvocationCache`).
 
     :ref: https://botocore.amazonaws.com/v1/documentation/api/latest/reference/services/lambda.html?highlight=invoke#Lambda.Client.invoke
     :exception: Lambda.Client.exceptions.ServiceException
@@ -62,7 +214,47 @@ async def invoke(
     :exception: Lambda.Client.exceptions.ResourceNotReadyException
     """
     if client is None:
-        client = create_client("lambda", config=config)
+        client = pooled_client("lambda", config=config)
+
+    if cache is not None and invocation_type == "RequestResponse":
+        if not isinstance(payload, bytes):
+            payload = payload.read()
+
+        async with client as client_obj:
+            key = (
+                client_obj.meta.region_name,
+                client_obj.meta.endpoint_url,
+                function_name,
+                qualifier,
+                log_type,
+                raise_function_error,
+                offload,
+                hashlib.sha256(payload).digest(),
+            )
+            # a shared call may outlive its first caller, so it needs a pooled client
+            shared = isinstance(client, PooledClientContext)
+            call = functools.partial(
+                invoke,
+                function_name,
+                invocation_type,
+                payload,
+                log_type,
+                qualifier=qualifier,
+                client=client if shared else SharedClientContext(client_obj),
+                raise_function_error=raise_function_error,
+                offload=offload,
+            )
+            return await cache._get_or_invoke(key, call, shared)
+
+    if offload is not None:
+        if not isinstance(payload, bytes):
+            payload = payload.read()
+        limit = (
+            LAMBDA_EVENT_PAYLOAD_LIMIT
+            if invocation_type == "Event"
+            else LAMBDA_PAYLOAD_LIMIT
+        )
+        payload = await offload.encode(payload, limit)
 
     async with client as client_obj:
         resp = await client_obj.invoke(
@@ -70,6 +262,7 @@ async def invoke(
             InvocationType=invocation_type,
             LogType=log_type,
             Payload=payload,
+            **({} if qualifier is None else {"Qualifier": qualifier}),
         )
         try:
             received_payload_stream = resp.pop("Payload")
@@ -77,10 +270,207 @@ async def invoke(
         except KeyError:
             received_payload = None
 
-        result = LambdaInvocationResponse(**resp, payload=received_payload)
+        if offload is not None and received_payload:
+            received_payload = await offload.decode(received_payload)
+
+        result = LambdaInvocationResponse(**resp, raw_payload=received_payload)
         if raise_function_error and not _is_success_response(
             resp["ResponseMetadata"]["HTTPHeaders"]
         ):
-            raise LambdaFunctionError(str(result.payload))
+            raise LambdaFunctionError(response=result)
 
         return result
+
+
+DEFAULT_INITIAL_CONCURRENCY = 10
+DEFAULT_MAX_CONCURRENCY = 100
+DEFAULT_THROTTLE_RETRIES = 5
+DEFAULT_ERROR_RETRIES = 2
+
+
+def _is_throttle_error(error: Exception) -> bool:
+    import botocore.exceptions
+
+    return (
+        isinstance(error, botocore.exceptions.ClientError)
+        and error.response.get("Error", {}).get("Code") == "TooManyRequestsException"
+    )
+
+
+def _is_retryable_error(error: Exception) -> bool:
+    """Server and connection errors, which botocore would retry itself"""
+    import botocore.exceptions
+
+    if isinstance(error, botocore.exceptions.ClientError):
+        status_code = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        return status_code is None or status_code >= 500
+
+    return isinstance(
+        error,
+        (
+            botocore.exceptions.HTTPClientError,
+            botocore.exceptions.ConnectionError,
+            asyncio.TimeoutError,
+            OSError,
+        ),
+    )
+
+
+class _AIMDLimiter:
+    """Concurrency limit with additive increase and multiplicative decrease.
+
+    Every success raises the limit by `1 / limit` (about one per round of
+    calls) and a throttle halves it, once for all the calls started before it.
+    """
+
+    __slots__ = (
+        "limit",
+        "min_limit",
+        "max_limit",
+        "in_flight",
+        "_epoch",
+        "_condition",
+    )
+    limit: float
+    min_limit: int
+    max_limit: int
+    in_flight: int
+    _epoch: int
+    _condition: asyncio.Condition
+
+    def __init__(self, initial_limit: int, min_limit: int, max_limit: int):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.in_flight = 0
+        self._epoch = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> int:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            return self._epoch
+
+    async def release(self, epoch: int, *, throttled: bool) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            if not throttled:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            elif epoch == self._epoch:
+                self._epoch += 1
+                self.limit = max(self.min_limit, self.limit / 2)
+            self._condition.notify_all()
+
+
+@dataclasses.dataclass(frozen=True)
+class InvocationResult:
+    index: int
+    response: Optional[LambdaInvocationResponse] = None
+    error: Optional[Exception] = None
+
+    @property
+    def is_success(self) -> bool:
+        return self.error is None
+
+
+async def invoke_many(
+    function_name: str,
+    payloads: Union[
+        Iterable[Union[bytes, BinaryIO]], AsyncIterable[Union[bytes, BinaryIO]]
+    ],
+    invocation_type: Literal["Event", "RequestResponse"] = "RequestResponse",
+    log_type: Literal["None", "Tail"] = "None",
+    *,
+    client: Optional[AioClientContext] = None,
+    config: Optional[botocore.client.Config] = None,
+    initial_concurrency: int = DEFAULT_INITIAL_CONCURRENCY,
+    min_concurrency: int = 1,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    throttle_retries: int = DEFAULT_THROTTLE_RETRIES,
+    error_retries: int = DEFAULT_ERROR_RETRIES,
+    offload: Optional[PayloadOffload] = None,
+) -> AsyncIterator[InvocationResult]:
+    """Invokes a function once per payload over one client and yields the
+    results, tagged with the index of their payload, as they complete.
+
+    The number of concurrent calls adapts between `min_concurrency` and
+    `max_concurrency` (AIMD): it grows while calls succeed and is halved on
+    `TooManyRequestsException`, and a throttled call is retried after a
+    jittered backoff, up to `throttle_retries` times. Server and connection
+    errors are retried the same way up to `error_retries` times, without
+    lowering the limit.
+    A failed call, including a `LambdaFunctionError`, is reported in its result
+    instead of stopping the others.
+    Without `client`, botocore's own retries are turned off so that throttles
+    reach the limiter; turn them off on a given client as well.
+    :example:
+        payloads = (json.dumps(job).encode() for job in jobs)
+        async for result in invoke_many("worker", payloads, max_concurrency=500):
+            ...
+    """
+    if client is None:
+        import botocore.config
+
+        no_retries = botocore.config.Config(retries={"max_attempts": 0})
+        client = pooled_client(
+            "lambda", config=config.merge(no_retries) if config else no_retries
+        )
+
+    limiter = _AIMDLimiter(
+        min(max(initial_concurrency, min_concurrency), max_concurrency),
+        min_concurrency,
+        max_concurrency,
+    )
+
+    async with client as client_obj:
+        shared_client = SharedClientContext(client_obj)
+
+        async def invoke_one(
+            item: tuple[int, Union[bytes, BinaryIO]],
+        ) -> InvocationResult:
+            index, payload = item
+            if not isinstance(payload, bytes):
+                # a retry sends the payload again
+                payload = payload.read()
+
+            throttles = errors = 0
+            while True:
+                epoch = await limiter.acquire()
+                try:
+                    resp = await invoke(
+                        function_name,
+                        invocation_type,
+                        payload,
+                        log_type,
+                        client=shared_client,
+                        offload=offload,
+                    )
+                except Exception as e:
+                    throttled = _is_throttle_error(e)
+                    await limiter.release(epoch, throttled=throttled)
+                    if throttled and throttles < throttle_retries:
+                        attempt, throttles = throttles, throttles + 1
+                    elif _is_retryable_error(e) and errors < error_retries:
+                        attempt, errors = errors, errors + 1
+                    else:
+                        return InvocationResult(index, error=e)
+
+                    await asyncio.sleep(random.uniform(0, 0.1 * (1 << attempt)))
+                    continue
+
+                await limiter.release(epoch, throttled=False)
+                return InvocationResult(index, response=resp)
+
+        async def enumerate_payloads() -> (
+            AsyncIterator[tuple[int, Union[bytes, BinaryIO]]]
+        ):
+            index = 0
+            async for payload in to_async_iterator(payloads):
+                yield index, payload
+                index += 1
+
+        async for result in concurrent_map(
+            invoke_one, enumerate_payloads(), concurrency=max_concurrency
+        ):
+            yield result
@@ -3,14 +3,26 @@ from __future__ import annotations
 __all__ = (
     "LambdaMultiprocessingError",
     "LambdaMultiprocessing",
+    "LambdaProcessPool",
+    "ProcessResult",
+    "get_pool_size",
 )
 
+import collections
+import contextlib
 import functools
 import json
+import math
 import multiprocessing.connection
+import multiprocessing.reduction
+import os
 import re
+import time
 import traceback
-from typing import Any, Callable
+from typing import Any, Callable, Generator, Iterator, NamedTuple, Optional
+
+MB_PER_VCPU = 1769
+DEFAULT_DEADLINE_MARGIN = 1.0
 
 
 def _get_traceback() -> list[str]:
@@ -25,17 +37,258 @@ def _get_traceback() -> list[str]:
     return stack_trace
 
 
+def _get_error_result(e: Exception) -> list:
+    error_message = {
+        "error_message": str(e),
+        "error_type": type(e).__name__,
+        "stack_trace": _get_traceback(),
+    }
+    return [False, error_message]
+
+
+def _get_exit_result(exitcode: Optional[int]) -> list:
+    error_message: dict[str, Any] = {
+        "error_message": f"worker process exited with code {exitcode}",
+        "error_type": "WorkerProcessExited",
+        "stack_trace": [],
+    }
+    return [False, error_message]
+
+
+def _get_deadline_result(started: bool) -> list:
+    error_message: dict[str, Any] = {
+        "error_message": (
+            "task did not complete before the deadline"
+            if started
+            else "task was not started before the deadline"
+        ),
+        "error_type": "DeadlineExceeded",
+        "stack_trace": [],
+    }
+    return [False, error_message]
+
+
+def _get_deadline(
+    timeout: Optional[float], context: Any, margin: float
+) -> Optional[float]:
+    now = time.monotonic()
+    deadlines = []
+    if timeout is not None:
+        deadlines.append(now + timeout)
+    if context is not None:
+        deadlines.append(now + context.get_remaining_time_in_millis() / 1000 - margin)
+    return min(deadlines, default=None)
+
+
+def _get_wait_timeout(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def _receive(connection: multiprocessing.connection.Connection) -> Optional[list]:
+    """Returns the result sent on `connection`, or None if its process died"""
+    try:
+        if connection.poll():
+            return connection.recv()
+    except (EOFError, OSError):
+        pass
+    return None
+
+
 def _run_callable(connection, func: Callable[[], Any]) -> None:
     try:
         result = func()
         connection.send([True, result])
     except Exception as e:
-        error_message = {
-            "error_message": str(e),
-            "error_type": type(e).__name__,
-            "stack_trace": _get_traceback(),
-        }
-        connection.send([False, error_message])
+        connection.send(_get_error_result(e))
+
+
+def _run_worker(connection) -> None:
+    while True:
+        try:
+            func = connection.recv()
+        except EOFError:
+            return
+
+        if func is None:
+            return
+        _run_callable(connection, func)
+
+
+def get_pool_size(memory_limit_in_mb: Optional[int] = None) -> int:
+    """Returns the number of vCPUs Lambda allocates for a memory size (1 per 1,769 MB).
+    The memory size defaults to `AWS_LAMBDA_FUNCTION_MEMORY_SIZE`, and the CPU count
+    is used outside of Lambda.
+
+    :ref: https://docs.aws.amazon.com/lambda/latest/dg/configuration-function-common.html#configuration-memory-console
+    :example:
+        >>> get_pool_size(1769), get_pool_size(3008), get_pool_size(10240)
+        (1, 2, 6)
+    """
+    if memory_limit_in_mb is None:
+        memory_size = os.environ.get("AWS_LAMBDA_FUNCTION_MEMORY_SIZE")
+        if memory_size is None:
+            return os.cpu_count() or 1
+        memory_limit_in_mb = int(memory_size)
+
+    return max(1, math.ceil(memory_limit_in_mb / MB_PER_VCPU))
+
+
+class _Worker:
+    __slots__ = (
+        "process",
+        "connection",
+        "task_index",
+    )
+    process: multiprocessing.Process
+    connection: multiprocessing.connection.Connection
+    task_index: Optional[int]
+
+    def __init__(self):
+        parent_conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_run_worker, args=(child_conn,), daemon=True
+        )
+        self.process.start()
+        # the parent only sees EOF on a crash if it does not hold the child end
+        child_conn.close()
+        self.connection = parent_conn
+        self.task_index = None
+
+    def stop(self) -> None:
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+
+class LambdaProcessPool:
+    """Worker processes kept alive across warm invocations of a container.
+
+    Unlike `multiprocessing.Pool`, it does not need `/dev/shm` (missing in Lambda):
+    each worker is connected by a `Pipe`. Workers are started on first use,
+    tasks go to idle workers, and a worker that crashes is replaced and its
+    task reported as failed. Tasks and results are pickled, so a task must be
+    a module-level function (or a partial of one).
+    :example:
+        pool = LambdaProcessPool()  # module level, reused while the container is warm
+
+        def handler(event, context):
+            mp = LambdaMultiprocessing(pool=pool)
+            for key in event["keys"]:
+                mp.add_process(resize, key)
+            return mp.run()
+    """
+
+    __slots__ = (
+        "size",
+        "_workers",
+    )
+    size: int
+    _workers: list[_Worker]
+
+    def __init__(self, size: Optional[int] = None):
+        self.size = size or get_pool_size()
+        self._workers = []
+
+    def __enter__(self) -> LambdaProcessPool:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def start(self) -> None:
+        while len(self._workers) < self.size:
+            self._workers.append(_Worker())
+
+    def close(self) -> None:
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        new_worker = _Worker()
+        self._workers[self._workers.index(worker)] = new_worker
+        return new_worker
+
+    def _iter_results(
+        self, tasks: list[Callable[[], Any]], deadline: Optional[float] = None
+    ) -> Generator[tuple[int, list], None, None]:
+        """Yields `(index, [is_success, result])` of the tasks as they complete"""
+        self.start()
+        pending = collections.deque(enumerate(tasks))
+        idle = collections.deque(self._workers)
+        busy: dict[Any, _Worker] = {}
+        try:
+            while pending or busy:
+                while pending and idle:
+                    worker = idle.popleft()
+                    if not worker.process.is_alive():
+                        worker = self._replace(worker)
+
+                    index, task = pending.popleft()
+                    try:
+                        data = multiprocessing.reduction.ForkingPickler.dumps(task)
+                    except Exception as e:
+                        idle.appendleft(worker)
+                        yield index, _get_error_result(e)
+                        continue
+
+                    try:
+                        worker.connection.send_bytes(data)
+                    except OSError:
+                        # died while idle, retried on a new worker
+                        pending.appendleft((index, task))
+                        idle.appendleft(self._replace(worker))
+                        continue
+
+                    worker.task_index = index
+                    busy[worker.connection] = worker
+                    busy[worker.process.sentinel] = worker
+
+                if not busy:
+                    # every task scheduled so far failed to pickle
+                    continue
+
+                ready = multiprocessing.connection.wait(
+                    list(busy), timeout=_get_wait_timeout(deadline)
+                )
+                if not ready:
+                    for worker in set(busy.values()):
+                        assert worker.task_index is not None
+                        index = worker.task_index
+                        self._replace(worker)
+                        yield index, _get_deadline_result(True)
+                    busy.clear()
+                    for index, _ in pending:
+                        yield index, _get_deadline_result(False)
+                    return
+
+                for worker in {busy[each] for each in ready if each in busy}:
+                    del busy[worker.connection], busy[worker.process.sentinel]
+                    assert worker.task_index is not None
+                    index, worker.task_index = worker.task_index, None
+                    result = _receive(worker.connection)
+                    if result is None:
+                        worker.process.join()
+                        result = _get_exit_result(worker.process.exitcode)
+                        worker = self._replace(worker)
+
+                    idle.append(worker)
+                    yield index, result
+        finally:
+            # a task still running would send its result to the next caller
+            for worker in set(busy.values()):
+                self._replace(worker)
 
 
 class LambdaMultiprocessingError(Exception):
@@ -52,49 +305,144 @@ class LambdaMultiprocessingError(Exception):
         return self.error_message
 
 
+class ProcessResult(NamedTuple):
+    task_index: int
+    is_success: bool
+    result: Any
+
+
 class LambdaMultiprocessing:
+    """Runs each task in a new process, or in the workers of `pool` if given"""
+
     __slots__ = (
         "_processes",
         "_parent_connections",
+        "_pool",
+        "_tasks",
     )
 
     _processes: list[multiprocessing.Process]
     _parent_connections: list[multiprocessing.connection.Connection]
+    _pool: Optional[LambdaProcessPool]
+    _tasks: list[Callable[[], Any]]
 
-    def __init__(self):
+    def __init__(self, pool: Optional[LambdaProcessPool] = None):
         self._processes = []
         self._parent_connections = []
+        self._pool = pool
+        self._tasks = []
 
     def clear(self) -> None:
         self._processes = []
         self._parent_connections = []
+        self._tasks = []
 
     def add_process(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
         cb = functools.partial(func, *args, **kwargs)
+        if self._pool is not None:
+            self._tasks.append(cb)
+            return
+
         parent_conn, child_conn = multiprocessing.Pipe()
         process = multiprocessing.Process(target=_run_callable, args=(child_conn, cb))
         self._processes.append(process)
         self._parent_connections.append(parent_conn)
 
-    def run(self) -> list[Any]:
+    def run(
+        self,
+        timeout: Optional[float] = None,
+        *,
+        context: Any = None,
+        margin: float = DEFAULT_DEADLINE_MARGIN,
+    ) -> list[Any]:
+        """Runs the tasks and returns their results in the order they were added.
+        Raises `LambdaMultiprocessingError` with every failure, including the tasks
+        stopped at the deadline (see `as_completed`).
+        """
+        results: list[Any] = [None] * (len(self._tasks) or len(self._processes))
+        for index, is_success, result in self.as_completed(
+            timeout, context=context, margin=margin
+        ):
+            results[index] = [is_success, result]
+        return self._check_results(results)
+
+    def as_completed(
+        self,
+        timeout: Optional[float] = None,
+        *,
+        context: Any = None,
+        margin: float = DEFAULT_DEADLINE_MARGIN,
+    ) -> Iterator[ProcessResult]:
+        """Runs the tasks and yields their results as they complete.
+
+        The deadline is `timeout` seconds from now or, with a Lambda `context`,
+        its remaining time less `margin` seconds (whichever comes first).
+        Tasks still running at the deadline are terminated and yielded as failed
+        with a `DeadlineExceeded` error, as are tasks not started yet.
+        :example:
+            for index, is_success, result in mp.as_completed(context=context):
+                if is_success:
+                    await upload(result)
+        """
+        deadline = _get_deadline(timeout, context, margin)
+        if self._pool is not None:
+            results = self._pool._iter_results(self._tasks, deadline)
+        else:
+            results = self._iter_process_results(deadline)
+
+        try:
+            with contextlib.closing(results):
+                for index, (is_success, result) in results:
+                    yield ProcessResult(index, is_success, result)
+        finally:
+            self.clear()
+
+    def _iter_process_results(
+        self, deadline: Optional[float]
+    ) -> Generator[tuple[int, list], None, None]:
         self._run_processes()
-        results = self._get_results()
-        self._join_processes()
-        self.clear()
-        return results
+        running: dict[Any, int] = {}
+        for index, process in enumerate(self._processes):
+            running[self._parent_connections[index]] = index
+            running[process.sentinel] = index
+
+        try:
+            while running:
+                ready = multiprocessing.connection.wait(
+                    list(running), timeout=_get_wait_timeout(deadline)
+                )
+                if not ready:
+                    for index in sorted(set(running.values())):
+                        self._kill_process(index)
+                        yield index, _get_deadline_result(True)
+                    running.clear()
+                    return
+
+                for index in {running[each] for each in ready if each in running}:
+                    process = self._processes[index]
+                    connection = self._parent_connections[index]
+                    del running[connection], running[process.sentinel]
+                    result = _receive(connection)
+                    process.join()
+                    if result is None:
+                        result = _get_exit_result(process.exitcode)
+                    yield index, result
+        finally:
+            for index in set(running.values()):
+                self._kill_process(index)
+
+    def _kill_process(self, index: int) -> None:
+        process = self._processes[index]
+        if process.is_alive():
+            process.kill()
+        process.join()
 
     def _run_processes(self) -> None:
         for process in self._processes:
             process.start()
 
-    def _join_processes(self) -> None:
-        for process in self._processes:
-            process.join()
-
-    def _get_results(self) -> list[Any]:
-        results: list[tuple[bool, Any]] = [
-            parent_connection.recv() for parent_connection in self._parent_connections
-        ]
+    @staticmethod
+    def _check_results(results: list[tuple[bool, Any]]) -> list[Any]:
         fail_results = [result for is_success, result in results if not is_success]
         if fail_results:
             raise LambdaMultiprocessingError(*fail_results)
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+__all__ = (
+    "SQS_PAYLOAD_LIMIT",
+    "LAMBDA_PAYLOAD_LIMIT",
+    "LAMBDA_EVENT_PAYLOAD_LIMIT",
+    "PayloadOffload",
+)
+
+import base64
+import gzip
+import io
+import json
+import uuid
+from typing import TYPE_CHECKING, Any, Optional, Literal, Union
+
+from lambda_utility.session import AioClientContext, pooled_client
+
+if TYPE_CHECKING:
+    import botocore.client
+
+KB = 1024
+MB = 1024 * KB
+SQS_PAYLOAD_LIMIT = 256 * KB
+LAMBDA_PAYLOAD_LIMIT = 6 * MB
+LAMBDA_EVENT_PAYLOAD_LIMIT = 256 * KB
+DEFAULT_PREFIX = "lambda-utility-payloads/"
+DEFAULT_MIN_SIZE = 1 * KB
+DEFAULT_MAX_SIZE = 256 * MB
+
+_ENVELOPE_KEY = "lambda_utility.payload"
+# the only key of an envelope, so it follows the opening brace and whitespace
+_ENVELOPE_MARKER = json.dumps(_ENVELOPE_KEY).encode()
+_ENVELOPE_MARKER_WINDOW = 64
+
+CompressionType = Literal["gzip", "zstd"]
+
+
+def _compress(data: bytes, compression: Optional[str]) -> bytes:
+    if compression == "gzip":
+        return gzip.compress(data, mtime=0)
+    if compression == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+def _decompress(data: bytes, compression: Optional[str], max_size: int) -> bytes:
+    """Raises ValueError rather than inflate `data` beyond `max_size` bytes"""
+    reader: Any = None
+    if compression == "gzip":
+        reader = gzip.GzipFile(fileobj=io.BytesIO(data))
+    elif compression == "zstd":
+        import zstandard
+
+        reader = zstandard.ZstdDecompressor().stream_reader(data)
+
+    if reader is not None:
+        chunks = []
+        size = 0
+        with reader:
+            while size <= max_size:
+                chunk = reader.read(max_size + 1 - size)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+        data = b"".join(chunks)
+
+    if len(data) > max_size:
+        raise ValueError(f"payload is larger than {max_size} bytes")
+    return data
+
+
+def _get_envelope(obj: Any) -> Optional[dict[str, Any]]:
+    """Returns the fields of an envelope, or None if `obj` is not one"""
+    if isinstance(obj, dict) and len(obj) == 1:
+        envelope = obj.get(_ENVELOPE_KEY)
+        if isinstance(envelope, dict):
+            return envelope
+    return None
+
+
+class PayloadOffload:
+    """Shrinks SQS messages and Lambda payloads which would exceed their limit.
+
+    A payload of `min_size` bytes or more is compressed (gzip, or zstd with the
+    `zstandard` package) and sent inline when that makes it smaller; if it is
+    still over the limit, it is written to `bucket` under `prefix` and only a
+    pointer is sent. Both forms are a small JSON envelope that `decode`
+    turns back into the original payload, so the receiving side must use
+    `PayloadOffload` as well. It only follows pointers into its own `bucket`
+    and `prefix`, and rejects payloads that decode to more than `max_size`
+    bytes. Offloaded objects are not deleted; expire them with a lifecycle
+    rule on `prefix`.
+    :example:
+        offload = PayloadOffload("my-bucket")
+        await sqs.send_message(queue_url, large_body, offload=offload)
+        response = await sqs.receive_message(queue_url, offload=offload)
+        body = await response.messages[0].read_body()
+    """
+
+    __slots__ = (
+        "bucket",
+        "prefix",
+        "compression",
+        "min_size",
+        "max_size",
+        "client",
+    )
+    bucket: str
+    prefix: str
+    compression: Optional[CompressionType]
+    min_size: int
+    max_size: int
+    client: AioClientContext
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = DEFAULT_PREFIX,
+        *,
+        compression: Optional[CompressionType] = "gzip",
+        min_size: int = DEFAULT_MIN_SIZE,
+        max_size: int = DEFAULT_MAX_SIZE,
+        client: Optional[AioClientContext] = None,
+        config: Optional[botocore.client.Config] = None,
+    ):
+        if client is None:
+            client = pooled_client("s3", config=config)
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.compression = compression
+        self.min_size = min_size
+        self.max_size = max_size
+        self.client = client
+
+    async def encode(self, data: Union[str, bytes], limit: int) -> bytes:
+        """Returns `data` as it is, or an envelope of at most `limit` bytes"""
+        from lambda_utility import s3storage
+
+        raw = data.encode() if isinstance(data, str) else data
+        if len(raw) < self.min_size:
+            return raw
+
+        compression = self.compression
+        compressed = _compress(raw, compression)
+        if len(compressed) >= len(raw):
+            compressed, compression = raw, None
+
+        envelope = self._make_envelope(
+            compression, data=base64.b64encode(compressed).decode()
+        )
+        if len(envelope) < len(raw) and len(envelope) <= limit:
+            return envelope
+        if len(raw) <= limit:
+            return raw
+
+        key = f"{self.prefix}{uuid.uuid4().hex}"
+        await s3storage.upload_object(self.bucket, key, compressed, client=self.client)
+        return self._make_envelope(compression, bucket=self.bucket, key=key)
+
+    async def decode(self, data: Union[str, bytes]) -> bytes:
+        """Returns the original payload of an envelope, or `data` itself"""
+        raw = data.encode() if isinstance(data, str) else data
+        # ordinary payloads pass through without being parsed
+        head = raw[:_ENVELOPE_MARKER_WINDOW].lstrip()
+        if not head.startswith(b"{") or _ENVELOPE_MARKER not in head:
+            return raw
+
+        try:
+            envelope = _get_envelope(json.loads(raw))
+        except ValueError:
+            return raw
+        return raw if envelope is None else await self._resolve(envelope)
+
+    async def encode_object(self, obj: Any, limit: int = LAMBDA_PAYLOAD_LIMIT) -> Any:
+        """`encode` for a JSON object, e.g. the return value of a Lambda handler"""
+        raw = json.dumps(obj).encode()
+        encoded = await self.encode(raw, limit)
+        return obj if encoded is raw else json.loads(encoded)
+
+    async def decode_object(self, obj: Any) -> Any:
+        """`decode` for a JSON object, e.g. the event of a Lambda handler"""
+        envelope = _get_envelope(obj)
+        if envelope is None:
+            return obj
+
+        return json.loads(await self._resolve(envelope))
+
+    async def _resolve(self, envelope: dict[str, Any]) -> bytes:
+        from lambda_utility import s3storage
+
+        if "data" in envelope:
+            compressed = base64.b64decode(envelope["data"])
+        else:
+            bucket, key = envelope["bucket"], envelope["key"]
+            # the sender must not make us read anything else our role can see
+            if bucket != self.bucket or not key.startswith(self.prefix):
+                raise ValueError(
+                    f"payload pointer s3://{bucket}/{key} is outside of "
+                    f"s3://{self.bucket}/{self.prefix}"
+                )
+
+            resp = await s3storage.download_object(bucket, key, client=self.client)
+            compressed = bytes(resp.body)  # type: ignore
+
+        return _decompress(compressed, envelope["compression"], self.max_size)
+
+    @staticmethod
+    def _make_envelope(compression: Optional[str], **fields: str) -> bytes:
+        return json.dumps(
+            {_ENVELOPE_KEY: {"compression": compression, **fields}}
+        ).encode()
@@ -7,31 +7,178 @@ __all__ = (
     "upload_file",
     "fetch_head",
     "ctx_download_file",
+    "UploadStream",
+    "TransferResult",
+    "download_many",
+    "upload_many",
+    "ObjectSummary",
+    "list_objects",
+    "list_directories",
+    "copy_object",
+    "copy_many",
+    "delete_many",
 )
 
+import asyncio
+import collections
 import contextlib
 import dataclasses
+import datetime
 import enum
+import functools
+import hashlib
+import itertools
 import json
+import os
 import pathlib
+import shutil
 import tempfile
-from typing import Any, Optional, Literal, BinaryIO, Union, AsyncIterator
-
-import aiobotocore
-import botocore.client
+import urllib.parse
+from types import TracebackType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Optional,
+    Literal,
+    BinaryIO,
+    Union,
+    AsyncIterator,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Generic,
+    Iterable,
+    Iterator,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
+from lambda_utility.cache import CacheEntry, ObjectCache
 from lambda_utility.path import PathExt
 from lambda_utility.schema import (
+    AWSResponseMetadata,
     S3GetObjectResponse,
     S3PutObjectResponse,
     S3HeadObjectResponse,
+    S3CopyObjectResponse,
+)
+from lambda_utility.session import (
+    AioClientContext,
+    SharedClientContext,
+    pooled_client,
 )
-from lambda_utility.session import create_client
+from lambda_utility.spool import SpooledFile
 from lambda_utility.typedefs import PathLike
+from lambda_utility.utils import (
+    batched,
+    concurrent_map,
+    to_async_iterator,
+    to_client_error,
+)
+
+if TYPE_CHECKING:
+    import botocore.client
 
 KB = 1024
+MB = 1024 * KB
+GB = 1024 * MB
 DEFAULT_CHUNK_SIZE = 64 * KB
+DEFAULT_PART_SIZE = 8 * MB
+DEFAULT_MULTIPART_THRESHOLD = 16 * MB
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_BATCH_CONCURRENCY = 10
+DEFAULT_PART_RETRIES = 2
+DEFAULT_PAGE_SIZE = 1000
 DEFAULT_CONTENT_TYPE = "binary/octet-stream"
+DEFAULT_COPY_PART_SIZE = 256 * MB
+DEFAULT_COPY_THRESHOLD = 5 * GB  # the largest object `copy_object` accepts
+MIN_PART_SIZE = 5 * MB
+MAX_PARTS = 10000
+MAX_DELETE_KEYS = 1000
+
+# parameters of `get_object` which `head_object` accepts as well
+_HEAD_OBJECT_PARAMS = frozenset(
+    (
+        "IfMatch",
+        "IfModifiedSince",
+        "IfNoneMatch",
+        "IfUnmodifiedSince",
+        "VersionId",
+        "SSECustomerAlgorithm",
+        "SSECustomerKey",
+        "SSECustomerKeyMD5",
+        "RequestPayer",
+        "ExpectedBucketOwner",
+    )
+)
+# parameters of `get_object` which are part of the cache key (the SSE-C ones)
+# or do not change the cached content
+_CACHEABLE_PARAMS = frozenset(
+    (
+        "VersionId",
+        "SSECustomerAlgorithm",
+        "SSECustomerKey",
+        "SSECustomerKeyMD5",
+        "RequestPayer",
+        "ExpectedBucketOwner",
+    )
+)
+# parameters of `create_multipart_upload` which every `upload_part` repeats
+_UPLOAD_PART_PARAMS = frozenset(
+    (
+        "SSECustomerAlgorithm",
+        "SSECustomerKey",
+        "SSECustomerKeyMD5",
+        "RequestPayer",
+        "ExpectedBucketOwner",
+    )
+)
+# parameters of `put_object` which describe the whole body and are not accepted
+# by `create_multipart_upload`
+_PUT_OBJECT_ONLY_PARAMS = frozenset(
+    (
+        "ContentLength",
+        "ContentMD5",
+    )
+)
+# parameters of `upload_part_copy` which are not accepted by `create_multipart_upload`
+_COPY_SOURCE_PARAMS = frozenset(
+    (
+        "CopySourceIfMatch",
+        "CopySourceIfModifiedSince",
+        "CopySourceIfNoneMatch",
+        "CopySourceIfUnmodifiedSince",
+        "CopySourceSSECustomerAlgorithm",
+        "CopySourceSSECustomerKey",
+        "CopySourceSSECustomerKeyMD5",
+        "ExpectedSourceBucketOwner",
+    )
+)
+# parameters of `copy_object` for its source, as named by `head_object`
+_COPY_SOURCE_HEAD_PARAMS = {
+    "CopySourceSSECustomerAlgorithm": "SSECustomerAlgorithm",
+    "CopySourceSSECustomerKey": "SSECustomerKey",
+    "CopySourceSSECustomerKeyMD5": "SSECustomerKeyMD5",
+    "ExpectedSourceBucketOwner": "ExpectedBucketOwner",
+    "RequestPayer": "RequestPayer",
+}
+# parameters of `copy_object` which `create_multipart_upload` does not accept
+_COPY_OBJECT_ONLY_PARAMS = _COPY_SOURCE_PARAMS | frozenset(
+    (
+        "MetadataDirective",
+        "TaggingDirective",
+    )
+)
+# error codes of `delete_objects` worth retrying for the key
+_RETRYABLE_ERROR_CODES = frozenset(
+    (
+        "InternalError",
+        "ServiceUnavailable",
+        "SlowDown",
+        "RequestTimeout",
+    )
+)
 
 
 def _stringfy_metadata(metadata: dict) -> dict[str, str]:
@@ -53,29 +200,265 @@ def _stringfy_metadata(metadata: dict) -> dict[str, str]:
     return result
 
 
+async def _run_workers(worker: Callable[[], Awaitable[None]], concurrency: int) -> None:
+    """Runs `concurrency` copies of `worker` and cancels the rest on the first failure"""
+    tasks = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+T = TypeVar("T")
+
+
+def _get_status_code(error: Exception) -> Optional[int]:
+    import botocore.exceptions
+
+    if isinstance(error, botocore.exceptions.ClientError):
+        return error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return None
+
+
+def _is_retryable_error(error: Exception) -> bool:
+    import botocore.exceptions
+
+    if isinstance(error, botocore.exceptions.ClientError):
+        status_code = _get_status_code(error)
+        return status_code is None or status_code >= 500
+
+    return isinstance(
+        error,
+        (
+            botocore.exceptions.HTTPClientError,
+            botocore.exceptions.ConnectionError,
+            asyncio.TimeoutError,
+            OSError,
+        ),
+    )
+
+
+async def _call_with_retry(func: Callable[[], Awaitable[T]], retries: int) -> T:
+    for attempt in itertools.count():
+        try:
+            return await func()
+        except Exception as e:
+            if attempt >= retries or not _is_retryable_error(e):
+                raise
+            await asyncio.sleep(0.1 * (1 << attempt))
+
+    raise AssertionError("unreachable")
+
+
+def _split_range(total_size: int, part_size: int) -> Iterator[tuple[int, int]]:
+    """
+    :example:
+        >>> list(_split_range(10, 4))
+        [(0, 3), (4, 7), (8, 9)]
+        >>> list(_split_range(0, 4))
+        []
+    """
+    for start in range(0, total_size, part_size):
+        yield start, min(start + part_size, total_size) - 1
+
+
+def _get_body_size(body: Union[bytes, BinaryIO]) -> Optional[int]:
+    """Returns the number of bytes left to read, or None for a non-seekable stream"""
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+
+    try:
+        position = body.tell()
+        size = body.seek(0, os.SEEK_END) - position
+        body.seek(position)
+    except (AttributeError, OSError):
+        return None
+
+    return size
+
+
+def _iter_parts(
+    body: Union[bytes, BinaryIO], part_size: int
+) -> Iterator[tuple[int, bytes]]:
+    if isinstance(body, (bytes, bytearray)):
+        for part_number, start in enumerate(range(0, len(body), part_size), start=1):
+            yield part_number, body[start : start + part_size]
+        return
+
+    for part_number in itertools.count(start=1):
+        data = body.read(part_size)
+        if not data:
+            return
+        yield part_number, data
+
+
+def _pwrite_all(fd: int, data: bytes, offset: int) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def _is_cacheable(kwargs: dict[str, Any]) -> bool:
+    return all(name in _CACHEABLE_PARAMS for name in kwargs)
+
+
+def _get_cache_key(bucket: str, key: PathLike, kwargs: dict[str, Any]) -> tuple:
+    sse_customer = tuple(
+        kwargs.get(name)
+        for name in ("SSECustomerAlgorithm", "SSECustomerKey", "SSECustomerKeyMD5")
+    )
+    # an object encrypted with another customer key must not share the entry,
+    # and the key itself is not kept in the index
+    sse_customer_digest = (
+        hashlib.sha256(repr(sse_customer).encode()).hexdigest()
+        if any(sse_customer)
+        else None
+    )
+    return bucket, str(key), kwargs.get("VersionId"), sse_customer_digest
+
+
+async def _fetch_cached(
+    client_obj: Any,
+    cache: ObjectCache,
+    bucket: str,
+    key: PathLike,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    **kwargs: Any,
+) -> tuple[CacheEntry, BinaryIO]:
+    """Returns the cache entry of the object, fetching it when missing or changed,
+    and its file opened before any other task can evict (and unlink) it.
+    """
+    cache_key = _get_cache_key(bucket, key, kwargs)
+    entry = cache.get(cache_key)
+    if entry is not None and cache.is_fresh(entry):
+        cache.mark_hit()
+        return entry, open(entry.path, "rb")
+
+    try:
+        if entry is not None:
+            kwargs["IfNoneMatch"] = entry.e_tag
+        resp = await client_obj.get_object(Bucket=bucket, Key=str(key), **kwargs)
+    except Exception as e:
+        if entry is None or _get_status_code(e) != 304:
+            raise
+        cache.mark_revalidated(entry)
+        return entry, open(entry.path, "rb")
+
+    path = cache.temporary_path()
+    try:
+        with open(path, "wb") as f:
+            async for chunk in resp["Body"].iter_chunks(chunk_size=chunk_size):
+                f.write(chunk)
+    except BaseException:
+        path.unlink()
+        raise
+
+    entry = cache.put(
+        cache_key,
+        path,
+        e_tag=resp["ETag"],
+        content_type=resp["ContentType"],
+        metadata=resp["Metadata"],
+        response_metadata=resp["ResponseMetadata"],
+    )
+    return entry, open(entry.path, "rb")
+
+
+def _get_cached_response(
+    entry: CacheEntry, body: Optional[Union[bytes, memoryview]] = None
+) -> S3GetObjectResponse:
+    return S3GetObjectResponse(
+        content_type=entry.content_type,
+        content_length=entry.size,
+        response_metadata=AWSResponseMetadata(**entry.response_metadata),
+        metadata=entry.metadata,
+        e_tag=entry.e_tag,
+        body=body,
+    )
+
+
+def _get_buffer(
+    buffer: Optional[Union[bytearray, memoryview]], size: int
+) -> memoryview:
+    if buffer is None:
+        return memoryview(bytearray(size))
+
+    view = memoryview(buffer).cast("B")
+    if view.readonly or len(view) < size:
+        raise ValueError(f"a writable buffer of at least {size} bytes required")
+    return view[:size]
+
+
+async def _read_into(stream: Any, view: memoryview, chunk_size: int) -> None:
+    offset = 0
+    async for chunk in stream.iter_chunks(chunk_size=chunk_size):
+        if offset + len(chunk) > len(view):
+            raise ValueError("received more data than the content length")
+        view[offset : offset + len(chunk)] = chunk
+        offset += len(chunk)
+
+
 async def download_object(
     bucket: str,
     key: PathLike,
     *,
-    client: Optional[aiobotocore.session.ClientCreatorContext] = None,
+    client: Optional[AioClientContext] = None,
     config: Optional[botocore.client.Config] = None,
+    cache: Optional[ObjectCache] = None,
+    preallocate: bool = False,
+    buffer: Optional[Union[bytearray, memoryview]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
     **kwargs: Any,
 ) -> S3GetObjectResponse:
     """
+    With `cache`, the object is served from the local cache while it is fresh
+    and revalidated with a conditional GET afterwards.
+
+    With `preallocate` or a writable `buffer` (e.g. reused across invocations),
+    the body is read chunk by chunk into a buffer of `ContentLength` bytes and
+    returned as a `memoryview` of it, so the peak memory is the object size
+    plus one chunk instead of twice the object size.
+
     ref: https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3.html#S3.Client.get_object
     """
     if client is None:
-        client = create_client("s3", config=config)
+        client = pooled_client("s3", config=config)
+
+    body: Union[bytes, memoryview]
+    if cache is not None and _is_cacheable(kwargs):
+        async with client as client_obj:
+            entry, cached_file = await _fetch_cached(
+                client_obj, cache, bucket, key, **kwargs
+            )
+
+        with cached_file:
+            if not preallocate and buffer is None:
+                return _get_cached_response(entry, cached_file.read())
+
+            body = _get_buffer(buffer, entry.size)
+            cached_file.readinto(body)  # type: ignore
+        return _get_cached_response(entry, body)
 
     async with client as client_obj:
         resp = await client_obj.get_object(Bucket=bucket, Key=str(key), **kwargs)
-        body = await resp["Body"].read()
+        if preallocate or buffer is not None:
+            body = _get_buffer(buffer, resp["ContentLength"])
+            await _read_into(resp["Body"], body, chunk_size)
+        else:
+            body = await resp["Body"].read()
 
     return S3GetObjectResponse(
         content_type=resp["ContentType"],
         content_length=resp["ContentLength"],
         response_metadata=resp["ResponseMetadata"],
         metadata=resp["Metadata"],
+        e_tag=resp["ETag"],
         body=body,
     )
 
@@ -85,16 +468,48 @@ async def download_file(
     key: PathLike,
     filename: PathLike,
     *,
-    client: Optional[aiobotocore.session.ClientCreatorContext] = None,
+    client: Optional[AioClientContext] = None,
     config: Optional[botocore.client.Config] = None,
     chunk_size: int = DEFAULT_CHUNK_SIZE,
+    part_size: int = DEFAULT_PART_SIZE,
+    max_concurrency: int = 1,
+    cache: Optional[ObjectCache] = None,
     **kwargs: Any,
 ) -> S3GetObjectResponse:
     """
+    If `max_concurrency` is greater than 1, the object is split into ranges of
+    `part_size` bytes which are fetched concurrently and written at their
+    offsets into a preallocated file; a `Range` given by the caller is fetched
+    with a single GET instead.
+    Raise `max_pool_connections` of the client config accordingly (default: 10).
+    With `cache`, the file is copied from the local cache (see `download_object`)
+    and a missing object is fetched with a single GET.
+
     ref: https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3.html#S3.Client.get_object
     """
     if client is None:
-        client = create_client("s3", config=config)
+        client = pooled_client("s3", config=config)
+
+    if cache is not None and _is_cacheable(kwargs):
+        async with client as client_obj:
+            entry, cached_file = await _fetch_cached(
+                client_obj, cache, bucket, key, chunk_size=chunk_size, **kwargs
+            )
+        with cached_file, open(filename, "wb") as f:
+            shutil.copyfileobj(cached_file, f)
+        return _get_cached_response(entry)
+
+    if max_concurrency > 1 and "Range" not in kwargs:
+        return await _download_file_ranges(
+            bucket,
+            key,
+            filename,
+            client=client,
+            chunk_size=chunk_size,
+            part_size=part_size,
+            max_concurrency=max_concurrency,
+            **kwargs,
+        )
 
     async with client as client_obj:
         resp = await client_obj.get_object(Bucket=bucket, Key=str(key), **kwargs)
@@ -109,6 +524,60 @@ async def download_file(
         content_length=resp["ContentLength"],
         response_metadata=resp["ResponseMetadata"],
         metadata=resp["Metadata"],
+        e_tag=resp["ETag"],
+        body=None,
+    )
+
+
+async def _download_file_ranges(
+    bucket: str,
+    key: PathLike,
+    filename: PathLike,
+    *,
+    client: AioClientContext,
+    chunk_size: int,
+    part_size: int,
+    max_concurrency: int,
+    **kwargs: Any,
+) -> S3GetObjectResponse:
+    async with client as client_obj:
+        head_kwargs = {k: v for k, v in kwargs.items() if k in _HEAD_OBJECT_PARAMS}
+        head = await client_obj.head_object(Bucket=bucket, Key=str(key), **head_kwargs)
+        # every range must come from the same version of the object
+        kwargs.setdefault("IfMatch", head["ETag"])
+        ranges = _split_range(head["ContentLength"], part_size)
+
+        fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            # fails early when `/tmp` is too small for the object
+            if hasattr(os, "posix_fallocate") and head["ContentLength"] > 0:
+                os.posix_fallocate(fd, 0, head["ContentLength"])
+            else:
+                os.ftruncate(fd, head["ContentLength"])
+
+            async def download_ranges() -> None:
+                for start, end in ranges:
+                    resp = await client_obj.get_object(
+                        Bucket=bucket,
+                        Key=str(key),
+                        Range=f"bytes={start}-{end}",
+                        **kwargs,
+                    )
+                    offset = start
+                    async for chunk in resp["Body"].iter_chunks(chunk_size=chunk_size):
+                        _pwrite_all(fd, chunk, offset)
+                        offset += len(chunk)
+
+            await _run_workers(download_ranges, max_concurrency)
+        finally:
+            os.close(fd)
+
+    return S3GetObjectResponse(
+        content_type=head["ContentType"],
+        content_length=head["ContentLength"],
+        response_metadata=head["ResponseMetadata"],
+        metadata=head["Metadata"],
+        e_tag=head["ETag"],
         body=None,
     )
 
@@ -132,15 +601,24 @@ async def upload_object(
     acl: ACLType = "private",
     content_type: str = DEFAULT_CONTENT_TYPE,
     metadata: Optional[dict] = None,
-    client: Optional[aiobotocore.session.ClientCreatorContext] = None,
+    client: Optional[AioClientContext] = None,
     config: Optional[botocore.client.Config] = None,
+    multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD,
+    part_size: int = DEFAULT_PART_SIZE,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    part_retries: int = DEFAULT_PART_RETRIES,
     **kwargs: Any,
 ) -> S3PutObjectResponse:
     """
+    A body of `multipart_threshold` bytes or more (bytes or a seekable file) is
+    sent as a multipart upload of `part_size` parts, `max_concurrency` at a time.
+    A failed part is retried `part_retries` times before the upload is aborted.
+
     ref: https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3.html#S3.Client.put_object
+    ref: https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3.html#S3.Client.create_multipart_upload
     """
     if client is None:
-        client = create_client("s3", config=config)
+        client = pooled_client("s3", config=config)
     if metadata is None:
         metadata = {}
 
@@ -150,6 +628,23 @@ async def upload_object(
     if content_type == "image/jpg":  # common mistake
         content_type = "image/jpeg"
 
+    size = _get_body_size(body)
+    if size is not None and size >= multipart_threshold:
+        return await _upload_multipart(
+            bucket,
+            key,
+            body,
+            size,
+            client=client,
+            acl=acl,
+            content_type=content_type,
+            metadata=metadata,
+            part_size=part_size,
+            max_concurrency=max_concurrency,
+            part_retries=part_retries,
+            **kwargs,
+        )
+
     async with client as client_obj:
         resp = await client_obj.put_object(
             Bucket=bucket,
@@ -164,6 +659,86 @@ async def upload_object(
     return S3PutObjectResponse(**resp)
 
 
+async def _upload_multipart(
+    bucket: str,
+    key: PathLike,
+    body: Union[bytes, BinaryIO],
+    size: int,
+    *,
+    client: AioClientContext,
+    acl: ACLType,
+    content_type: str,
+    metadata: dict,
+    part_size: int,
+    max_concurrency: int,
+    part_retries: int,
+    **kwargs: Any,
+) -> S3PutObjectResponse:
+    if part_size < MIN_PART_SIZE:
+        raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes")
+
+    part_size = max(part_size, -(-size // MAX_PARTS))
+    create_kwargs = {
+        k: v for k, v in kwargs.items() if k not in _PUT_OBJECT_ONLY_PARAMS
+    }
+    part_kwargs = {k: v for k, v in kwargs.items() if k in _UPLOAD_PART_PARAMS}
+    parts = _iter_parts(body, part_size)
+    completed_parts: list[dict[str, Any]] = []
+
+    async with client as client_obj:
+        upload = await client_obj.create_multipart_upload(
+            Bucket=bucket,
+            Key=str(key),
+            ACL=acl,
+            ContentType=content_type,
+            Metadata=_stringfy_metadata(metadata),
+            **create_kwargs,
+        )
+        upload_id = upload["UploadId"]
+
+        async def upload_parts() -> None:
+            # parts are read one at a time between awaits,
+            # so at most `max_concurrency` of them are held in memory
+            for part_number, data in parts:
+                resp = await _call_with_retry(
+                    functools.partial(
+                        client_obj.upload_part,
+                        Bucket=bucket,
+                        Key=str(key),
+                        UploadId=upload_id,
+                        PartNumber=part_number,
+                        Body=data,
+                        **part_kwargs,
+                    ),
+                    part_retries,
+                )
+                completed_parts.append(
+                    {"PartNumber": part_number, "ETag": resp["ETag"]}
+                )
+
+        try:
+            await _run_workers(
+                upload_parts, max(1, min(max_concurrency, -(-size // part_size)))
+            )
+            completed_parts.sort(key=lambda part: part["PartNumber"])
+            resp = await client_obj.complete_multipart_upload(
+                Bucket=bucket,
+                Key=str(key),
+                UploadId=upload_id,
+                MultipartUpload={"Parts": completed_parts},
+                **part_kwargs,
+            )
+        except BaseException:
+            # uploaded parts are billed until the upload is aborted
+            with contextlib.suppress(Exception):
+                await client_obj.abort_multipart_upload(
+                    Bucket=bucket, Key=str(key), UploadId=upload_id
+                )
+            raise
+
+    return S3PutObjectResponse(**resp)
+
+
 async def upload_file(
     bucket: str,
     key: PathLike,
@@ -172,11 +747,17 @@ async def upload_file(
     acl: ACLType = "private",
     content_type: str = DEFAULT_CONTENT_TYPE,
     metadata: Optional[dict[str, str]] = None,
-    client: Optional[aiobotocore.session.ClientCreatorContext] = None,
+    client: Optional[AioClientContext] = None,
     config: Optional[botocore.client.Config] = None,
+    multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD,
+    part_size: int = DEFAULT_PART_SIZE,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    part_retries: int = DEFAULT_PART_RETRIES,
     **kwargs: Any,
 ) -> S3PutObjectResponse:
     """
+    See `upload_object` for the multipart upload of large files.
+
     ref: https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3.html#S3.Client.put_object
     """
     with open(filepath, "rb") as f:
@@ -189,15 +770,210 @@ async def upload_file(
             metadata=metadata,
             client=client,
             config=config,
+            multipart_threshold=multipart_threshold,
+            part_size=part_size,
+            max_concurrency=max_concurrency,
+            part_retries=part_retries,
             **kwargs,
         )
 
 
+class UploadStream:
+    """Uploads an object of unknown size that is written piece by piece.
+
+    Written data is cut into parts of `part_size` bytes that are uploaded in
+    the background, `max_concurrency` at a time, so at most that many parts are
+    held in memory. An object smaller than one part is sent with `put_object`.
+    Leaving the block completes the upload (see `response`),
+    or aborts it when an exception was raised.
+
+    :example:
+        async with UploadStream(bucket, key) as stream:
+            async for chunk in produce():
+                await stream.write(chunk)
+        print(stream.response.e_tag)
+    """
+
+    __slots__ = (
+        "bucket",
+        "key",
+        "response",
+        "_client",
+        "_client_obj",
+        "_acl",
+        "_content_type",
+        "_metadata",
+        "_part_size",
+        "_max_concurrency",
+        "_part_retries",
+        "_kwargs",
+        "_buffer",
+        "_upload_id",
+        "_part_number",
+        "_tasks",
+        "_completed_parts",
+    )
+
+    def __init__(
+        self,
+        bucket: str,
+        key: PathLike,
+        *,
+        acl: ACLType = "private",
+        content_type: str = DEFAULT_CONTENT_TYPE,
+        metadata: Optional[dict] = None,
+        client: Optional[AioClientContext] = None,
+        config: Optional[botocore.client.Config] = None,
+        part_size: int = DEFAULT_PART_SIZE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        part_retries: int = DEFAULT_PART_RETRIES,
+        **kwargs: Any,
+    ):
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes")
+        if content_type == "image/jpg":  # common mistake
+            content_type = "image/jpeg"
+
+        self.bucket = bucket
+        self.key = key
+        self.response: Optional[S3PutObjectResponse] = None
+        self._client = (
+            client if client is not None else pooled_client("s3", config=config)
+        )
+        self._acl = acl
+        self._content_type = content_type
+        self._metadata = _stringfy_metadata(metadata if metadata is not None else {})
+        self._part_size = part_size
+        self._max_concurrency = max_concurrency
+        self._part_retries = part_retries
+        self._kwargs = kwargs
+        self._buffer = bytearray()
+        self._upload_id: Optional[str] = None
+        self._part_number = 0
+        self._tasks: set[asyncio.Future] = set()
+        self._completed_parts: list[dict[str, Any]] = []
+
+    async def __aenter__(self) -> UploadStream:
+        self._client_obj = await self._client.__aenter__()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        try:
+            if exc_type is None:
+                self.response = await self._complete()
+            else:
+                await self._abort()
+        finally:
+            await self._client.__aexit__(exc_type, exc_value, traceback)
+
+    async def write(self, data: bytes) -> None:
+        self._buffer += data
+        while len(self._buffer) >= self._part_size:
+            part = bytes(self._buffer[: self._part_size])
+            del self._buffer[: self._part_size]
+            await self._submit_part(part)
+
+    async def _submit_part(self, data: bytes) -> None:
+        if self._upload_id is None:
+            upload = await self._client_obj.create_multipart_upload(
+                Bucket=self.bucket,
+                Key=str(self.key),
+                ACL=self._acl,
+                ContentType=self._content_type,
+                Metadata=self._metadata,
+                **{
+                    k: v
+                    for k, v in self._kwargs.items()
+                    if k not in _PUT_OBJECT_ONLY_PARAMS
+                },
+            )
+            self._upload_id = upload["UploadId"]
+
+        while len(self._tasks) >= self._max_concurrency:
+            done, self._tasks = await asyncio.wait(
+                self._tasks, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                task.result()
+
+        self._part_number += 1
+        self._tasks.add(
+            asyncio.ensure_future(self._upload_part(self._part_number, data))
+        )
+
+    async def _upload_part(self, part_number: int, data: bytes) -> None:
+        part_kwargs = {
+            k: v for k, v in self._kwargs.items() if k in _UPLOAD_PART_PARAMS
+        }
+        resp = await _call_with_retry(
+            functools.partial(
+                self._client_obj.upload_part,
+                Bucket=self.bucket,
+                Key=str(self.key),
+                UploadId=self._upload_id,
+                PartNumber=part_number,
+                Body=data,
+                **part_kwargs,
+            ),
+            self._part_retries,
+        )
+        self._completed_parts.append({"PartNumber": part_number, "ETag": resp["ETag"]})
+
+    async def _complete(self) -> S3PutObjectResponse:
+        if self._upload_id is None:
+            resp = await self._client_obj.put_object(
+                Bucket=self.bucket,
+                Key=str(self.key),
+                Body=bytes(self._buffer),
+                ACL=self._acl,
+                ContentType=self._content_type,
+                Metadata=self._metadata,
+                **self._kwargs,
+            )
+            return S3PutObjectResponse(**resp)
+
+        try:
+            if self._buffer:
+                await self._submit_part(bytes(self._buffer))
+                self._buffer.clear()
+            await asyncio.gather(*self._tasks)
+            self._completed_parts.sort(key=lambda part: part["PartNumber"])
+            resp = await self._client_obj.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=str(self.key),
+                UploadId=self._upload_id,
+                MultipartUpload={"Parts": self._completed_parts},
+                **{k: v for k, v in self._kwargs.items() if k in _UPLOAD_PART_PARAMS},
+            )
+        except BaseException:
+            await self._abort()
+            raise
+
+        return S3PutObjectResponse(**resp)
+
+    async def _abort(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+        if self._upload_id is not None:
+            with contextlib.suppress(Exception):
+                await self._client_obj.abort_multipart_upload(
+                    Bucket=self.bucket, Key=str(self.key), UploadId=self._upload_id
+                )
+
+
 async def fetch_head(
     bucket: str,
     key: PathLike,
     *,
-    client: Optional[aiobotocore.session.ClientCreatorContext] = None,
+    client: Optional[AioClientContext] = None,
     config: Optional[botocore.client.Config] = None,
     **kwargs: Any,
 ) -> S3HeadObjectResponse:
@@ -205,7 +981,7 @@ async def fetch_head(
     ref: https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3.html#S3.Client.head_object
     """
     if client is None:
-        client = create_client("s3", config=config)
+        client = pooled_client("s3", config=config)
 
     async with client as client_obj:
         resp = await client_obj.head_object(Bucket=bucket, Key=str(key), **kwargs)
@@ -218,32 +994,690 @@ async def ctx_download_file(
     bucket: str,
     key: PathLike,
     *,
-    client: Optional[aiobotocore.session.ClientCreatorContext] = None,
+    client: Optional[AioClientContext] = None,
     config: Optional[botocore.client.Config] = None,
     chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cache: Optional[ObjectCache] = None,
+    spool_threshold: Optional[int] = None,
+    spill_to: Literal["memfd", "disk"] = "memfd",
     **kwargs: Any,
-) -> AsyncIterator[tuple[PathExt, S3GetObjectResponse]]:
+) -> AsyncIterator[tuple[Union[PathExt, SpooledFile], S3GetObjectResponse]]:
     """
+    With `cache`, the temporary file is a copy of the cached object
+    (see `download_object`).
+
+    With `spool_threshold`, a `SpooledFile` is yielded instead of a path:
+    the object stays in memory up to `spool_threshold` bytes and is spilled
+    to `spill_to` above it. `os.fspath()` on it gives a real path when needed.
+
     ref: https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3.html#S3.Client.get_object
     """
     if client is None:
-        client = create_client("s3", config=config)
+        client = pooled_client("s3", config=config)
 
-    async with client as client_obj:
-        resp = await client_obj.get_object(Bucket=bucket, Key=str(key), **kwargs)
-        suffix = getattr(key, "suffix", pathlib.PurePath(key).suffix)
-        stream = resp["Body"]
+    suffix = getattr(key, "suffix", pathlib.PurePath(key).suffix)
+    if spool_threshold is not None:
+        with SpooledFile(spool_threshold, suffix=suffix, spill_to=spill_to) as spooled:
+            if cache is not None and _is_cacheable(kwargs):
+                async with client as client_obj:
+                    entry, cached_file = await _fetch_cached(
+                        client_obj, cache, bucket, key, chunk_size=chunk_size, **kwargs
+                    )
+                with cached_file:
+                    shutil.copyfileobj(cached_file, spooled, chunk_size)  # type: ignore
+                result = _get_cached_response(entry)
+            else:
+                async with client as client_obj:
+                    resp = await client_obj.get_object(
+                        Bucket=bucket, Key=str(key), **kwargs
+                    )
+                    if resp["ContentLength"] > spool_threshold:
+                        spooled.rollover()
+                    async for chunk in resp["Body"].iter_chunks(chunk_size=chunk_size):
+                        spooled.write(chunk)
+
+                result = S3GetObjectResponse(
+                    content_type=resp["ContentType"],
+                    content_length=resp["ContentLength"],
+                    response_metadata=resp["ResponseMetadata"],
+                    metadata=resp["Metadata"],
+                    e_tag=resp["ETag"],
+                    body=None,
+                )
+
+            spooled.seek(0)
+            yield spooled, result
+        return
+
+    if cache is not None and _is_cacheable(kwargs):
         with tempfile.NamedTemporaryFile(suffix=suffix) as f:
+            result = await download_file(
+                bucket, key, f.name, client=client, cache=cache, **kwargs
+            )
+            yield PathExt(f.name), result
+        return
+
+    with tempfile.NamedTemporaryFile(suffix=suffix) as f:
+        # the client is released before the caller starts working on the file
+        async with client as client_obj:
+            resp = await client_obj.get_object(Bucket=bucket, Key=str(key), **kwargs)
+            stream = resp["Body"]
             async for chunk in stream.iter_chunks(chunk_size=chunk_size):
                 f.write(chunk)
 
-            await client_obj.close()
+        f.flush()
+        result = S3GetObjectResponse(
+            content_type=resp["ContentType"],
+            content_length=resp["ContentLength"],
+            response_metadata=resp["ResponseMetadata"],
+            metadata=resp["Metadata"],
+            e_tag=resp["ETag"],
+            body=None,
+        )
+        yield PathExt(f.name), result
+
+
+ResponseT = TypeVar("ResponseT")
+
+DownloadJob = Tuple[str, PathLike, Optional[PathLike]]
+UploadJob = Union[
+    Tuple[str, PathLike, Union[PathLike, bytes, BinaryIO]],
+    Tuple[str, PathLike, Union[PathLike, bytes, BinaryIO], dict],
+]
+
+
+@dataclasses.dataclass(frozen=True)
+class TransferResult(Generic[ResponseT]):
+    bucket: str
+    key: PathLike
+    response: Optional[ResponseT] = None
+    error: Optional[Exception] = None
+
+    @property
+    def is_success(self) -> bool:
+        return self.error is None
+
 
-            result = S3GetObjectResponse(
-                content_type=resp["ContentType"],
-                content_length=resp["ContentLength"],
+async def download_many(
+    jobs: Union[Iterable[DownloadJob], AsyncIterable[DownloadJob]],
+    *,
+    client: Optional[AioClientContext] = None,
+    config: Optional[botocore.client.Config] = None,
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    **kwargs: Any,
+) -> AsyncIterator[TransferResult[S3GetObjectResponse]]:
+    """Downloads `(bucket, key, filename)` jobs over one client and yields
+    the results as they complete. A job without a filename is read into memory.
+    A failed job is reported in its result instead of stopping the others.
+    """
+    if client is None:
+        client = pooled_client("s3", config=config)
+
+    async with client as client_obj:
+        shared_client = SharedClientContext(client_obj)
+
+        async def download(job: DownloadJob) -> TransferResult[S3GetObjectResponse]:
+            bucket, key, filename = job
+            try:
+                if filename is None:
+                    resp = await download_object(
+                        bucket, key, client=shared_client, **kwargs
+                    )
+                else:
+                    resp = await download_file(
+                        bucket, key, filename, client=shared_client, **kwargs
+                    )
+            except Exception as e:
+                return TransferResult(bucket, key, error=e)
+
+            return TransferResult(bucket, key, response=resp)
+
+        async for result in concurrent_map(download, jobs, concurrency=max_concurrency):
+            yield result
+
+
+async def upload_many(
+    jobs: Union[Iterable[UploadJob], AsyncIterable[UploadJob]],
+    *,
+    acl: ACLType = "private",
+    content_type: str = DEFAULT_CONTENT_TYPE,
+    metadata: Optional[dict] = None,
+    client: Optional[AioClientContext] = None,
+    config: Optional[botocore.client.Config] = None,
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    **kwargs: Any,
+) -> AsyncIterator[TransferResult[S3PutObjectResponse]]:
+    """Uploads `(bucket, key, filepath or body)` jobs over one client and yields
+    the results as they complete. An optional fourth item of a job overrides
+    the keyword arguments of `upload_object` for that job, e.g. `ContentType`.
+    A failed job is reported in its result instead of stopping the others.
+    """
+    if client is None:
+        client = pooled_client("s3", config=config)
+
+    async with client as client_obj:
+        shared_client = SharedClientContext(client_obj)
+
+        async def upload(job: UploadJob) -> TransferResult[S3PutObjectResponse]:
+            bucket, key, body, *job_kwargs = job
+            upload_kwargs = {
+                "acl": acl,
+                "content_type": content_type,
+                "metadata": metadata,
+                **kwargs,
+                **(job_kwargs[0] if job_kwargs else {}),
+            }
+            try:
+                if isinstance(body, (str, pathlib.PurePath)):
+                    resp = await upload_file(
+                        bucket, key, body, client=shared_client, **upload_kwargs
+                    )
+                else:
+                    resp = await upload_object(
+                        bucket, key, body, client=shared_client, **upload_kwargs
+                    )
+            except Exception as e:
+                return TransferResult(bucket, key, error=e)
+
+            return TransferResult(bucket, key, response=resp)
+
+        async for result in concurrent_map(upload, jobs, concurrency=max_concurrency):
+            yield result
+
+
+@dataclasses.dataclass(frozen=True)
+class ObjectSummary:
+    __slots__ = ("key", "size", "e_tag", "last_modified")
+    key: PathExt
+    size: int
+    e_tag: str
+    last_modified: datetime.datetime
+
+
+@dataclasses.dataclass(frozen=True)
+class _ListShard:
+    prefix: str
+    start_after: Optional[str] = None
+    stop_at: Optional[str] = None
+
+
+def _get_shards(prefix: str, boundaries: Iterable[str]) -> list[_ListShard]:
+    """
+    :example:
+        >>> _get_shards("a/", "m")
+        [_ListShard(prefix='a/', start_after=None, stop_at='a/m'), _ListShard(prefix='a/', start_after='a/m', stop_at=None)]
+    """
+    bounds = [None, *(prefix + boundary for boundary in sorted(set(boundaries))), None]
+    return [
+        _ListShard(prefix, lower, upper) for lower, upper in zip(bounds, bounds[1:])
+    ]
+
+
+def _get_directory(prefix: str, delimiter: str) -> str:
+    """
+    :example:
+        >>> _get_directory("a/b/", "/")
+        'a/b'
+        >>> _get_directory("", "/")
+        '.'
+    """
+    return prefix.rpartition(delimiter)[0] or "."
+
+
+async def _list_pages(
+    client_obj: Any,
+    bucket: str,
+    shards: Iterable[_ListShard],
+    *,
+    delimiter: Optional[str],
+    max_concurrency: int,
+    page_size: int,
+    **kwargs: Any,
+) -> AsyncIterator[tuple[_ListShard, list[ObjectSummary], bool]]:
+    """Lists the shards concurrently a page at a time and yields
+    `(shard, objects, is_last_page)` in completion order.
+    With `delimiter`, every common prefix is listed as a new shard.
+    """
+    # the next page of a shard goes first, so started shards finish early
+    waiting: collections.deque[tuple[_ListShard, Optional[str]]] = collections.deque(
+        (shard, None) for shard in shards
+    )
+    pending: dict[asyncio.Future, _ListShard] = {}
+
+    async def list_page(shard: _ListShard, token: Optional[str]) -> dict:
+        params = {"Bucket": bucket, "Prefix": shard.prefix, "MaxKeys": page_size}
+        if delimiter is not None:
+            params["Delimiter"] = delimiter
+        if shard.start_after is not None:
+            params["StartAfter"] = shard.start_after
+        if token is not None:
+            params["ContinuationToken"] = token
+        return await client_obj.list_objects_v2(**params, **kwargs)
+
+    try:
+        while waiting or pending:
+            while waiting and len(pending) < max_concurrency:
+                shard, token = waiting.popleft()
+                pending[asyncio.ensure_future(list_page(shard, token))] = shard
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                shard = pending.pop(future)
+                resp = future.result()
+                contents = resp.get("Contents", [])
+                objects = [
+                    ObjectSummary(
+                        key=PathExt(obj["Key"]),
+                        size=obj["Size"],
+                        e_tag=obj["ETag"],
+                        last_modified=obj["LastModified"],
+                    )
+                    for obj in contents
+                    if shard.stop_at is None or obj["Key"] <= shard.stop_at
+                ]
+                is_last = not resp["IsTruncated"] or len(objects) < len(contents)
+                if not is_last:
+                    waiting.appendleft((shard, resp["NextContinuationToken"]))
+                waiting.extend(
+                    (_ListShard(common_prefix["Prefix"]), None)
+                    for common_prefix in resp.get("CommonPrefixes", [])
+                )
+                yield shard, objects, is_last
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def list_objects(
+    bucket: str,
+    prefix: str = "",
+    *,
+    delimiter: Optional[str] = None,
+    boundaries: Optional[Iterable[str]] = None,
+    client: Optional[AioClientContext] = None,
+    config: Optional[botocore.client.Config] = None,
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    **kwargs: Any,
+) -> AsyncIterator[ObjectSummary]:
+    """Lists every object under `prefix`, yielding each page as soon as it arrives.
+
+    The keyspace is split into shards which are listed concurrently:
+    with `delimiter` (e.g. "/") every common prefix (directory) is a shard,
+    with `boundaries` (e.g. "0123456789abcdef") shard `i` holds the keys in
+    `(prefix + boundaries[i - 1], prefix + boundaries[i]]`.
+    Objects are in key order within a shard only.
+    :example:
+        async for obj in list_objects(bucket, "frames/", boundaries="0123456789"):
+            print(obj.key, obj.size)
+
+    ref: https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3.html#S3.Client.list_objects_v2
+    """
+    if delimiter is not None and boundaries is not None:
+        raise ValueError("`delimiter` and `boundaries` cannot be used together")
+
+    if client is None:
+        client = pooled_client("s3", config=config)
+
+    shards = _get_shards(prefix, boundaries or ())
+    async with client as client_obj:
+        async for _, objects, _ in _list_pages(
+            client_obj,
+            bucket,
+            shards,
+            delimiter=delimiter,
+            max_concurrency=max_concurrency,
+            page_size=page_size,
+            **kwargs,
+        ):
+            for obj in objects:
+                yield obj
+
+
+async def list_directories(
+    bucket: str,
+    prefix: str = "",
+    *,
+    delimiter: str = "/",
+    client: Optional[AioClientContext] = None,
+    config: Optional[botocore.client.Config] = None,
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    **kwargs: Any,
+) -> AsyncIterator[tuple[str, list[ObjectSummary]]]:
+    """Lists every object under `prefix` grouped by directory, like `path.classify_directory`.
+
+    Directories are listed concurrently and each `(directory, objects)` is
+    yielded once as soon as the directory is complete, so only the
+    directories in progress are held in memory.
+    Directories without objects are skipped.
+
+    ref: https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3.html#S3.Client.list_objects_v2
+    """
+    if client is None:
+        client = pooled_client("s3", config=config)
+
+    in_progress: dict[_ListShard, list[ObjectSummary]] = {}
+    async with client as client_obj:
+        async for shard, objects, is_last in _list_pages(
+            client_obj,
+            bucket,
+            [_ListShard(prefix)],
+            delimiter=delimiter,
+            max_concurrency=max_concurrency,
+            page_size=page_size,
+            **kwargs,
+        ):
+            directory_objects = in_progress.setdefault(shard, [])
+            directory_objects.extend(objects)
+            if is_last:
+                del in_progress[shard]
+                if directory_objects:
+                    yield _get_directory(shard.prefix, delimiter), directory_objects
+
+
+async def copy_object(
+    bucket: str,
+    key: PathLike,
+    new_key: PathLike,
+    *,
+    new_bucket: Optional[str] = None,
+    size: Optional[int] = None,
+    client: Optional[AioClientContext] = None,
+    config: Optional[botocore.client.Config] = None,
+    multipart_threshold: int = DEFAULT_COPY_THRESHOLD,
+    part_size: int = DEFAULT_COPY_PART_SIZE,
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    part_retries: int = DEFAULT_PART_RETRIES,
+    **kwargs: Any,
+) -> S3CopyObjectResponse:
+    """Copies an object inside S3, without transferring it through the caller.
+
+    An object of `multipart_threshold` bytes or more is copied as a multipart
+    upload of `part_size` parts (`upload_part_copy`), `max_concurrency` at a time.
+    Without `size`, the size of the source object is fetched with `head_object`.
+
+    ref: https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3.html#S3.Client.copy_object
+    ref: https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3.html#S3.Client.upload_part_copy
+    """
+    if client is None:
+        client = pooled_client("s3", config=config)
+    if new_bucket is None:
+        new_bucket = bucket
+
+    copy_source = {"Bucket": bucket, "Key": str(key)}
+    head_kwargs = {
+        _COPY_SOURCE_HEAD_PARAMS[k]: v
+        for k, v in kwargs.items()
+        if k in _COPY_SOURCE_HEAD_PARAMS
+    }
+    async with client as client_obj:
+        head = None
+        if size is None:
+            head = await client_obj.head_object(**copy_source, **head_kwargs)
+            size = head["ContentLength"]
+
+        if size < multipart_threshold:
+            resp = await client_obj.copy_object(
+                Bucket=new_bucket, Key=str(new_key), CopySource=copy_source, **kwargs
+            )
+            return S3CopyObjectResponse(
                 response_metadata=resp["ResponseMetadata"],
-                metadata=resp["Metadata"],
-                body=None,
+                e_tag=resp["CopyObjectResult"]["ETag"],
             )
-            yield PathExt(f.name), result
+
+        if head is None:
+            head = await client_obj.head_object(**copy_source, **head_kwargs)
+
+        return await _copy_multipart(
+            client_obj,
+            copy_source,
+            head,
+            new_bucket,
+            new_key,
+            part_size=part_size,
+            max_concurrency=max_concurrency,
+            part_retries=part_retries,
+            **kwargs,
+        )
+
+
+async def _copy_multipart(
+    client_obj: Any,
+    copy_source: dict[str, str],
+    head: dict[str, Any],
+    bucket: str,
+    key: PathLike,
+    *,
+    part_size: int,
+    max_concurrency: int,
+    part_retries: int,
+    **kwargs: Any,
+) -> S3CopyObjectResponse:
+    if part_size < MIN_PART_SIZE:
+        raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes")
+
+    size = head["ContentLength"]
+    part_size = max(part_size, -(-size // MAX_PARTS))
+    part_kwargs = {
+        k: v
+        for k, v in kwargs.items()
+        if k in _UPLOAD_PART_PARAMS or k in _COPY_SOURCE_PARAMS
+    }
+    # every part must come from the same version of the object
+    part_kwargs.setdefault("CopySourceIfMatch", head["ETag"])
+    create_kwargs = {
+        k: v for k, v in kwargs.items() if k not in _COPY_OBJECT_ONLY_PARAMS
+    }
+    # `copy_object` carries the metadata and tags over, a multipart upload does not
+    if kwargs.get("MetadataDirective") != "REPLACE":
+        create_kwargs.update(ContentType=head["ContentType"], Metadata=head["Metadata"])
+    if kwargs.get("TaggingDirective") != "REPLACE":
+        tagging_kwargs = {k: v for k, v in kwargs.items() if k == "RequestPayer"}
+        if "ExpectedSourceBucketOwner" in kwargs:
+            tagging_kwargs["ExpectedBucketOwner"] = kwargs["ExpectedSourceBucketOwner"]
+        tagging = await client_obj.get_object_tagging(**copy_source, **tagging_kwargs)
+        create_kwargs.pop("Tagging", None)
+        if tagging["TagSet"]:
+            create_kwargs["Tagging"] = urllib.parse.urlencode(
+                [(tag["Key"], tag["Value"]) for tag in tagging["TagSet"]]
+            )
+
+    parts = enumerate(_split_range(size, part_size), start=1)
+    completed_parts: list[dict[str, Any]] = []
+
+    upload = await client_obj.create_multipart_upload(
+        Bucket=bucket, Key=str(key), **create_kwargs
+    )
+    upload_id = upload["UploadId"]
+
+    async def copy_parts() -> None:
+        for part_number, (start, end) in parts:
+            resp = await _call_with_retry(
+                functools.partial(
+                    client_obj.upload_part_copy,
+                    Bucket=bucket,
+                    Key=str(key),
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    CopySource=copy_source,
+                    CopySourceRange=f"bytes={start}-{end}",
+                    **part_kwargs,
+                ),
+                part_retries,
+            )
+            completed_parts.append(
+                {"PartNumber": part_number, "ETag": resp["CopyPartResult"]["ETag"]}
+            )
+
+    try:
+        await _run_workers(
+            copy_parts, max(1, min(max_concurrency, -(-size // part_size)))
+        )
+        completed_parts.sort(key=lambda part: part["PartNumber"])
+        resp = await client_obj.complete_multipart_upload(
+            Bucket=bucket,
+            Key=str(key),
+            UploadId=upload_id,
+            MultipartUpload={"Parts": completed_parts},
+            **{k: v for k, v in part_kwargs.items() if k in _UPLOAD_PART_PARAMS},
+        )
+    except BaseException:
+        # copied parts are billed until the upload is aborted
+        with contextlib.suppress(Exception):
+            await client_obj.abort_multipart_upload(
+                Bucket=bucket, Key=str(key), UploadId=upload_id
+            )
+        raise
+
+    return S3CopyObjectResponse(**resp)
+
+
+ObjectKey = Union[PathLike, ObjectSummary]
+
+
+async def copy_many(
+    bucket: str,
+    keys: Union[Iterable[ObjectKey], AsyncIterable[ObjectKey]],
+    key_map: Callable[[PathExt], PathLike],
+    *,
+    new_bucket: Optional[str] = None,
+    client: Optional[AioClientContext] = None,
+    config: Optional[botocore.client.Config] = None,
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    **kwargs: Any,
+) -> AsyncIterator[TransferResult[S3CopyObjectResponse]]:
+    """Copies every key to `key_map(key)` inside S3 over one client and yields
+    the results, named after the new keys, as they complete.
+    `ObjectSummary` keys (e.g. from `list_objects`) save a `head_object` call
+    per object when it is large enough for a multipart copy.
+    A failed job is reported in its result instead of stopping the others.
+    :example:
+        async for result in copy_many(
+            bucket, list_objects(bucket, "tmp/"), lambda key: key.replace_root("out")
+        ):
+            ...
+    """
+    if client is None:
+        client = pooled_client("s3", config=config)
+    if new_bucket is None:
+        new_bucket = bucket
+
+    async with client as client_obj:
+        shared_client = SharedClientContext(client_obj)
+
+        async def copy(source: ObjectKey) -> TransferResult[S3CopyObjectResponse]:
+            size = None
+            if isinstance(source, ObjectSummary):
+                key, size = source.key, source.size
+            else:
+                key = source if isinstance(source, PathExt) else PathExt(source)
+
+            new_key = key_map(key)
+            try:
+                resp = await copy_object(
+                    bucket,
+                    key,
+                    new_key,
+                    new_bucket=new_bucket,
+                    size=size,
+                    client=shared_client,
+                    **kwargs,
+                )
+            except Exception as e:
+                return TransferResult(new_bucket, new_key, error=e)
+
+            return TransferResult(new_bucket, new_key, response=resp)
+
+        async for result in concurrent_map(copy, keys, concurrency=max_concurrency):
+            yield result
+
+
+async def delete_many(
+    bucket: str,
+    keys: Union[Iterable[ObjectKey], AsyncIterable[ObjectKey]],
+    *,
+    client: Optional[AioClientContext] = None,
+    config: Optional[botocore.client.Config] = None,
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    retries: int = DEFAULT_PART_RETRIES,
+    **kwargs: Any,
+) -> AsyncIterator[TransferResult[None]]:
+    """Deletes the keys in `delete_objects` batches of up to 1000 keys over one
+    client, `max_concurrency` batches at a time, and yields a result per key
+    as its batch completes. `keys` may come straight from `list_objects`.
+    Only the keys reported as failed with a transient error are sent again,
+    up to `retries` times; a failed key is reported with a `ClientError`.
+    :example:
+        async for result in delete_many(bucket, list_objects(bucket, "tmp/")):
+            if not result.is_success:
+                ...
+
+    ref: https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3.html#S3.Client.delete_objects
+    """
+    if client is None:
+        client = pooled_client("s3", config=config)
+
+    async def iter_keys() -> AsyncIterator[str]:
+        async for key in to_async_iterator(keys):
+            yield str(key.key if isinstance(key, ObjectSummary) else key)
+
+    async with client as client_obj:
+
+        async def delete(batch: list[str]) -> list[TransferResult[None]]:
+            results: list[TransferResult[None]] = []
+            for attempt in itertools.count():
+                try:
+                    resp = await _call_with_retry(
+                        functools.partial(
+                            client_obj.delete_objects,
+                            Bucket=bucket,
+                            # only the failed keys are listed in a quiet response
+                            Delete={
+                                "Objects": [{"Key": k} for k in batch],
+                                "Quiet": True,
+                            },
+                            **kwargs,
+                        ),
+                        retries,
+                    )
+                except Exception as e:
+                    results.extend(
+                        TransferResult(bucket, key, error=e) for key in batch
+                    )
+                    return results
+
+                errors = {error["Key"]: error for error in resp.get("Errors", [])}
+                failed_keys: list[str] = []
+                for key in batch:
+                    error = errors.get(key)
+                    if error is None:
+                        results.append(TransferResult(bucket, key))
+                    elif (
+                        attempt < retries
+                        and error.get("Code") in _RETRYABLE_ERROR_CODES
+                    ):
+                        failed_keys.append(key)
+                    else:
+                        results.append(
+                            TransferResult(
+                                bucket,
+                                key,
+                                error=to_client_error(error, "DeleteObjects"),
+                            )
+                        )
+
+                if not failed_keys:
+                    return results
+
+                batch = failed_keys
+                await asyncio.sleep(0.1 * (1 << attempt))
+
+            raise AssertionError("unreachable")
+
+        batches = batched(iter_keys(), MAX_DELETE_KEYS)
+        async for results in concurrent_map(
+            delete, batches, concurrency=max_concurrency
+        ):
+            for result in results:
+                yield result
@@ -3,6 +3,7 @@ from __future__ import annotations
 __all__ = (
     "camelize",
     "pascalize",
+    "BytesLike",
     "Base64String",
     "JsonString",
     "JsonDumpString",
@@ -16,6 +17,7 @@ __all__ = (
     "S3GetObjectResponse",
     "S3PutObjectResponse",
     "S3HeadObjectResponse",
+    "S3CopyObjectResponse",
     "LambdaInvocationResponse",
     "LambdaErrorResponse",
     "SQSSendMessageResponse",
@@ -30,11 +32,47 @@ import base64
 import json
 import logging
 import pathlib
-from typing import Dict, Optional, AnyStr, Any, cast, Union, List, TypeVar, Generic
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Mapping,
+    Optional,
+    AnyStr,
+    Any,
+    cast,
+    Union,
+    List,
+    Type,
+    TypeVar,
+    Generic,
+)
 
 import pydantic
 import pydantic.generics
 
+if TYPE_CHECKING:
+    from pydantic.typing import AbstractSetIntStr, MappingIntStrAny
+
+    from lambda_utility.offload import PayloadOffload
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+
+def _json_loads(v: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """Parses with orjson when installed, and with `json` what orjson rejects
+    (e.g. NaN and Infinity)"""
+    if orjson is not None:
+        try:
+            return orjson.loads(v)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(bytes(v) if isinstance(v, memoryview) else v)
+
+
 from lambda_utility.path import PathExt
 from lambda_utility.typedefs import PathLike
 
@@ -63,6 +101,26 @@ def pascalize(s: str) -> str:
     return "".join(word.capitalize() for word in words)
 
 
+if TYPE_CHECKING:
+    # the field holds the value as it is, so type checkers see the real types
+    BytesLike = Union[bytes, bytearray, memoryview]
+else:
+
+    class BytesLike(bytes):
+        """bytes, bytearray or memoryview kept as it is (without a copy)"""
+
+        @classmethod
+        def __get_validators__(cls):
+            yield cls.validate
+
+        @classmethod
+        def validate(cls, v: Any) -> Union[bytes, bytearray, memoryview]:
+            if not isinstance(v, (bytes, bytearray, memoryview)):
+                raise TypeError("bytes-like object required")
+
+            return v
+
+
 class Base64String(str):
     @classmethod
     def __get_validators__(cls):
@@ -219,7 +277,8 @@ class S3GetObjectResponse(_AWSBaseSchema):
     metadata: Dict[str, str]
     content_length: int
     content_type: str
-    body: Optional[bytes] = None
+    e_tag: Optional[str] = None
+    body: Optional[BytesLike] = None
 
 
 class S3PutObjectResponse(_AWSBaseSchema):
@@ -242,6 +301,18 @@ class S3HeadObjectResponse(_AWSBaseSchema):
     content_type: str
 
 
+class S3CopyObjectResponse(_AWSBaseSchema):
+    """
+    https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3.html#S3.Client.copy_object
+    """
+
+    response_metadata: AWSResponseMetadata
+    e_tag: str
+
+
+ModelT = TypeVar("ModelT")
+
+
 class LambdaInvocationResponse(_AWSBaseSchema):
     """
     https://botocore.amazonaws.com/v1/documentation/api/latest/reference/services/lambda.html?highlight=invoke#Lambda.Client.invoke
@@ -249,10 +320,111 @@ class LambdaInvocationResponse(_AWSBaseSchema):
 
     response_metadata: AWSResponseMetadata
     status_code: int
-    payload: Optional[JsonString] = None
+    raw_payload: Optional[BytesLike] = None
     executed_version: Optional[str] = None
     function_error: Optional[str] = None
     log_result: Optional[Base64String] = None
+    _payload: Any = pydantic.PrivateAttr(default=None)
+    _payload_parsed: bool = pydantic.PrivateAttr(default=False)
+
+    @pydantic.root_validator(pre=True)
+    def _accept_payload(cls, values: Dict[str, Any]) -> Dict[str, Any]:
+        for name in ("payload", "Payload"):
+            if name in values:
+                values.setdefault("raw_payload", values.pop(name))
+        if isinstance(values.get("raw_payload"), str):
+            values["raw_payload"] = values["raw_payload"].encode()
+        return values
+
+    @property
+    def payload(self) -> Any:
+        """JSON payload parsed on first access (the raw bytes if it is not JSON)"""
+        if not self._payload_parsed:
+            self._payload_parsed = True
+            try:
+                self._payload = (
+                    None if self.raw_payload is None else _json_loads(self.raw_payload)
+                )
+            except ValueError:
+                self._payload = self.raw_payload
+        return self._payload
+
+    def parse_payload(self, model: Type[ModelT]) -> ModelT:
+        """Parses the payload into `model`, e.g. a pydantic model or `List[Model]`
+
+        :example:
+            result = await invoke("resize", "RequestResponse", payload)
+            meta = result.parse_payload(ImageMeta)
+        """
+        return pydantic.parse_obj_as(model, self.payload)
+
+    def dict(
+        self,
+        *,
+        include: Optional[Union[AbstractSetIntStr, MappingIntStrAny]] = None,
+        exclude: Optional[Union[AbstractSetIntStr, MappingIntStrAny]] = None,
+        by_alias: bool = False,
+        skip_defaults: Optional[bool] = None,
+        exclude_unset: bool = False,
+        exclude_defaults: bool = False,
+        exclude_none: bool = False,
+    ) -> Dict[str, Any]:
+        """Exports the parsed `payload` in place of `raw_payload`, as when it was a field"""
+        data = super().dict(
+            include=_to_raw_payload_keys(include),
+            exclude=_to_raw_payload_keys(exclude),
+            by_alias=by_alias,
+            skip_defaults=skip_defaults,
+            exclude_unset=exclude_unset,
+            exclude_defaults=exclude_defaults,
+            exclude_none=exclude_none,
+        )
+        raw_key, key = (
+            ("RawPayload", "Payload") if by_alias else ("raw_payload", "payload")
+        )
+        return {
+            (key if k == raw_key else k): (self.payload if k == raw_key else v)
+            for k, v in data.items()
+        }
+
+    def json(
+        self,
+        *,
+        include: Optional[Union[AbstractSetIntStr, MappingIntStrAny]] = None,
+        exclude: Optional[Union[AbstractSetIntStr, MappingIntStrAny]] = None,
+        by_alias: bool = False,
+        skip_defaults: Optional[bool] = None,
+        exclude_unset: bool = False,
+        exclude_defaults: bool = False,
+        exclude_none: bool = False,
+        encoder: Optional[Callable[[Any], Any]] = None,
+        models_as_dict: bool = True,
+        **dumps_kwargs: Any,
+    ) -> str:
+        """`json` of `dict`, since pydantic does not build it with `dict`"""
+        data = self.dict(
+            include=include,
+            exclude=exclude,
+            by_alias=by_alias,
+            skip_defaults=skip_defaults,
+            exclude_unset=exclude_unset,
+            exclude_defaults=exclude_defaults,
+            exclude_none=exclude_none,
+        )
+        return self.__config__.json_dumps(
+            data, default=encoder or self.__json_encoder__, **dumps_kwargs
+        )
+
+
+def _to_raw_payload_keys(
+    keys: Optional[Union[AbstractSetIntStr, MappingIntStrAny]],
+) -> Optional[Union[AbstractSetIntStr, MappingIntStrAny]]:
+    """Maps the former `payload` field of include/exclude to `raw_payload`"""
+    if keys is None:
+        return None
+    if isinstance(keys, Mapping):
+        return {("raw_payload" if k == "payload" else k): v for k, v in keys.items()}
+    return {"raw_payload" if k == "payload" else k for k in keys}
 
 
 class LambdaErrorResponse(BaseSchema):
@@ -291,6 +463,17 @@ class SQSReceiveMessage(_AWSBaseGenericSchema, Generic[BodyT]):
         None, alias="MD5OfMessageAttributes"
     )
     message_attributes: Optional[Dict[str, Dict[str, Any]]]
+    _offload: Optional[PayloadOffload] = pydantic.PrivateAttr(default=None)
+
+    async def read_body(self) -> Union[BodyT, str]:
+        """Returns `body`, restored on first call if it was sent through the
+        `PayloadOffload` the message was received with"""
+        offload = self._offload
+        if offload is not None and isinstance(self.body, str):
+            body = (await offload.decode(self.body)).decode()
+            if self._offload is offload:
+                self.body, self._offload = body, None
+        return self.body
 
 
 class SQSReceiveMessageResponse(_AWSBaseSchema):
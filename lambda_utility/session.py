@@ -2,15 +2,83 @@ from __future__ import annotations
 
 __all__ = (
     "DEFAULT_CONFIG",
+    "AioClientContext",
+    "ClientPool",
+    "PooledClientContext",
+    "SharedClientContext",
     "create_client",
+    "get_client_pool",
+    "pooled_client",
+    "close_pooled_clients",
+    "prewarm",
 )
 
-from typing import Optional, Union
+import asyncio
+import functools
+import hashlib
+import logging
+from types import TracebackType
+from typing import (
+    TYPE_CHECKING,
+    Optional,
+    Union,
+    Any,
+    Type,
+    Iterable,
+    AsyncGenerator,
+)
+
+if TYPE_CHECKING:
+    import aiobotocore
+    import botocore.client
+
+logger = logging.getLogger(__file__)
+
+
+def __getattr__(name: str) -> Any:
+    # botocore and aiobotocore are imported on first use to keep cold starts short
+    if name == "DEFAULT_CONFIG":
+        return _get_default_config()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@functools.lru_cache(maxsize=None)
+def _get_default_config() -> botocore.client.Config:
+    import botocore.config
+
+    return botocore.config.Config(connect_timeout=300, read_timeout=300)
+
+
+def _get_session() -> aiobotocore.session.AioSession:
+    import aiobotocore
+
+    return aiobotocore.get_session()
+
+
+def _merge_config(
+    config: Optional[botocore.client.Config],
+) -> Optional[botocore.client.Config]:
+    if config:
+        return _get_default_config().merge(config)
+    return config
+
+
+def _config_key(config: Optional[botocore.client.Config]) -> tuple:
+    if config is None:
+        return ()
+
+    # `Config` is not hashable, but the options passed by the user identify it
+    options = config._user_provided_options  # type: ignore
+    return tuple(sorted((name, repr(value)) for name, value in options.items()))
+
 
-import aiobotocore
-import botocore.client
+def _credentials_key(*credentials: Optional[str]) -> Optional[str]:
+    # keeps secret keys out of the long-lived registry
+    if not any(credentials):
+        return None
 
-DEFAULT_CONFIG = botocore.client.Config(connect_timeout=300, read_timeout=300)
+    return hashlib.sha256(repr(credentials).encode()).hexdigest()
 
 
 def create_client(
@@ -25,9 +93,7 @@ def create_client(
     aws_session_token: Optional[str] = None,
     config: Optional[botocore.client.Config] = None,
 ) -> aiobotocore.session.ClientCreatorContext:
-    session = aiobotocore.get_session()
-    if config:
-        config = DEFAULT_CONFIG.merge(config)
+    session = _get_session()
 
     return session.create_client(
         service_name,
@@ -39,5 +105,297 @@ def create_client(
         aws_access_key_id=aws_access_key_id,
         aws_secret_access_key=aws_secret_access_key,
         aws_session_token=aws_session_token,
-        config=config,
+        config=_merge_config(config),
+    )
+
+
+class ClientPool:
+    """Registry of long-lived clients shared by every helper in the process.
+
+    Clients are keyed by their creation arguments (service, region, endpoint,
+    credentials and config) and stay open until `close` is called, so their
+    connection pools survive across warm invocations.
+    An aiohttp connection belongs to the event loop that opened it, so clients
+    are kept per running loop; run the handler on a long-lived loop
+    (e.g. `loop.run_until_complete`) instead of `asyncio.run` to reuse them.
+    The clients of a loop are closed when it shuts down its async generators
+    (as `asyncio.run` does), and dropped once the loop is found closed.
+    """
+
+    __slots__ = (
+        "_session",
+        "_clients",
+        "_closers",
+    )
+
+    _session: Optional[aiobotocore.session.AioSession]
+    _clients: dict[asyncio.AbstractEventLoop, dict[tuple, asyncio.Future]]
+    _closers: dict[asyncio.AbstractEventLoop, AsyncGenerator[None, None]]
+
+    def __init__(self):
+        self._session = None
+        self._clients = {}
+        self._closers = {}
+
+    def _get_session(self) -> aiobotocore.session.AioSession:
+        if self._session is None:
+            self._session = _get_session()
+        return self._session
+
+    async def get_client(
+        self,
+        service_name: str,
+        region_name: Optional[str] = None,
+        api_version: Optional[str] = None,
+        use_ssl: bool = True,
+        verify: Optional[Union[bool, str]] = None,
+        endpoint_url: Optional[str] = None,
+        aws_access_key_id: Optional[str] = None,
+        aws_secret_access_key: Optional[str] = None,
+        aws_session_token: Optional[str] = None,
+        config: Optional[botocore.client.Config] = None,
+    ) -> aiobotocore.client.AioBaseClient:
+        clients = await self._get_loop_clients()
+        key = (
+            service_name,
+            region_name,
+            api_version,
+            use_ssl,
+            verify,
+            endpoint_url,
+            _credentials_key(
+                aws_access_key_id, aws_secret_access_key, aws_session_token
+            ),
+            _config_key(config),
+        )
+
+        future = clients.get(key)
+        if future is None:
+            # concurrent callers wait for the same client instead of racing
+            context = self._get_session().create_client(
+                service_name,
+                region_name=region_name,
+                api_version=api_version,
+                use_ssl=use_ssl,
+                verify=verify,
+                endpoint_url=endpoint_url,
+                aws_access_key_id=aws_access_key_id,
+                aws_secret_access_key=aws_secret_access_key,
+                aws_session_token=aws_session_token,
+                config=_merge_config(config),
+            )
+            future = clients[key] = asyncio.ensure_future(context.__aenter__())
+
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            if clients.get(key) is future:
+                del clients[key]
+            raise
+
+    async def _get_loop_clients(self) -> dict[tuple, asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        clients = self._clients.get(loop)
+        if clients is None:
+            self._evict_closed_loops()
+            clients = self._clients[loop] = {}
+            # the loop tracks the generator from its first step and closes it
+            # in `shutdown_asyncgens`, while it can still close the clients
+            closer = self._closers[loop] = self._close_on_shutdown(loop)
+            await closer.asend(None)
+        return clients
+
+    async def _close_on_shutdown(
+        self, loop: asyncio.AbstractEventLoop
+    ) -> AsyncGenerator[None, None]:
+        try:
+            yield
+        finally:
+            self._closers.pop(loop, None)
+            await self._close_clients(self._clients.pop(loop, {}))
+
+    def _evict_closed_loops(self) -> None:
+        # their clients can no longer be closed, only released
+        for loop in [loop for loop in self._clients if loop.is_closed()]:
+            del self._clients[loop]
+            self._closers.pop(loop, None)
+
+    def client(self, service_name: str, **kwargs: Any) -> PooledClientContext:
+        return PooledClientContext(self, service_name, kwargs)
+
+    async def prewarm(
+        self,
+        services: Iterable[str] = ("s3", "sqs", "lambda"),
+        regions: Optional[Iterable[Optional[str]]] = None,
+        *,
+        connections: int = 1,
+        config: Optional[botocore.client.Config] = None,
+    ) -> None:
+        """Resolves credentials, loads the service models and opens connections
+        ahead of the first request, e.g. in the INIT phase of a Lambda function.
+
+        The warmed clients are the ones the helpers pick up later, as long as
+        they are requested with the same region and config
+        (the helpers use the default region).
+        Failures are logged and left to surface on the first real request.
+        """
+        regions = (None,) if regions is None else tuple(regions)
+
+        try:
+            await self._get_session().get_credentials()
+        except Exception:
+            logger.warning("[Prewarm] failed to resolve credentials", exc_info=True)
+
+        await asyncio.gather(
+            *(
+                self._prewarm_client(service_name, region_name, connections, config)
+                for service_name in services
+                for region_name in regions
+            )
+        )
+
+    async def _prewarm_client(
+        self,
+        service_name: str,
+        region_name: Optional[str],
+        connections: int,
+        config: Optional[botocore.client.Config],
+    ) -> None:
+        try:
+            client_obj = await self.get_client(
+                service_name, region_name=region_name, config=config
+            )
+            # any response leaves an open (TLS) connection in the client's pool,
+            # so an unsigned HEAD to the endpoint is enough
+            http_session = client_obj._endpoint.http_session
+            endpoint_url = client_obj.meta.endpoint_url
+            await asyncio.gather(
+                *(
+                    self._open_connection(http_session, endpoint_url)
+                    for _ in range(connections)
+                )
+            )
+        except Exception:
+            logger.warning(
+                "[Prewarm] failed to warm up %r (%s)",
+                service_name,
+                region_name,
+                exc_info=True,
+            )
+
+    @staticmethod
+    async def _open_connection(http_session: Any, endpoint_url: str) -> None:
+        async with http_session.head(endpoint_url) as resp:
+            await resp.read()
+
+    async def close(self) -> None:
+        """Closes every client opened on the running event loop."""
+        loop = asyncio.get_running_loop()
+        closer = self._closers.get(loop)
+        if closer is not None:
+            await closer.aclose()
+        else:
+            await self._close_clients(self._clients.pop(loop, {}))
+
+    @staticmethod
+    async def _close_clients(clients: dict[tuple, asyncio.Future]) -> None:
+        results = await asyncio.gather(*clients.values(), return_exceptions=True)
+        for client_obj in results:
+            if not isinstance(client_obj, BaseException):
+                await client_obj.__aexit__(None, None, None)
+
+
+class PooledClientContext:
+    """`async with` compatible handle to a pooled client.
+
+    Unlike `aiobotocore.session.ClientCreatorContext` it can be entered any
+    number of times, and leaving the block keeps the client open.
+    """
+
+    __slots__ = (
+        "_pool",
+        "_service_name",
+        "_kwargs",
+    )
+
+    def __init__(self, pool: ClientPool, service_name: str, kwargs: dict[str, Any]):
+        self._pool = pool
+        self._service_name = service_name
+        self._kwargs = kwargs
+
+    async def __aenter__(self) -> aiobotocore.client.AioBaseClient:
+        return await self._pool.get_client(self._service_name, **self._kwargs)
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        pass
+
+
+class SharedClientContext:
+    """`async with` compatible handle to a client that is already open.
+
+    Lets several helpers run over one client; the owner of the client closes it.
+    """
+
+    __slots__ = ("_client_obj",)
+
+    def __init__(self, client_obj: aiobotocore.client.AioBaseClient):
+        self._client_obj = client_obj
+
+    async def __aenter__(self) -> aiobotocore.client.AioBaseClient:
+        return self._client_obj
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        pass
+
+
+AioClientContext = Union[
+    "aiobotocore.session.ClientCreatorContext",
+    "PooledClientContext",
+    "SharedClientContext",
+]
+
+_default_pool = ClientPool()
+
+
+def get_client_pool() -> ClientPool:
+    return _default_pool
+
+
+def pooled_client(service_name: str, **kwargs: Any) -> PooledClientContext:
+    """Returns a handle to the process-wide client, see `create_client` for arguments."""
+    return _default_pool.client(service_name, **kwargs)
+
+
+async def close_pooled_clients() -> None:
+    await _default_pool.close()
+
+
+async def prewarm(
+    services: Iterable[str] = ("s3", "sqs", "lambda"),
+    regions: Optional[Iterable[Optional[str]]] = None,
+    *,
+    connections: int = 1,
+    config: Optional[botocore.client.Config] = None,
+) -> None:
+    """Warms up the process-wide clients, see `ClientPool.prewarm`.
+
+    :example:
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(prewarm(services=["s3", "sqs"]))
+
+        def handler(event, context):
+            return loop.run_until_complete(main(event, context))
+    """
+    await _default_pool.prewarm(
+        services, regions, connections=connections, config=config
     )
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+__all__ = ("SpooledFile",)
+
+import io
+import os
+import tempfile
+from types import TracebackType
+from typing import Optional, Type, Literal, BinaryIO, Union
+
+
+class SpooledFile:
+    """File kept in memory until it grows over `max_size` bytes.
+
+    Above the threshold the content is moved to an anonymous in-memory file
+    (`memfd`, Linux only) or to a temporary file on disk, see `spill_to`.
+    `os.fspath()` returns a real path for tools such as ffmpeg, spilling
+    the content first if needed. A `memfd` path has no file extension,
+    so use `spill_to="disk"` for tools that rely on it.
+    """
+
+    __slots__ = (
+        "max_size",
+        "suffix",
+        "spill_to",
+        "_file",
+        "_path",
+    )
+    max_size: int
+    suffix: str
+    spill_to: Literal["memfd", "disk"]
+    _file: BinaryIO
+    _path: Optional[str]
+
+    def __init__(
+        self,
+        max_size: int,
+        *,
+        suffix: str = "",
+        spill_to: Literal["memfd", "disk"] = "memfd",
+    ):
+        self.max_size = max_size
+        self.suffix = suffix
+        self.spill_to = spill_to if hasattr(os, "memfd_create") else "disk"
+        self._file = io.BytesIO()
+        self._path = None
+
+    def __enter__(self) -> SpooledFile:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def __fspath__(self) -> str:
+        self.rollover()
+        self._file.flush()
+        return str(self._path)
+
+    @property
+    def rolled(self) -> bool:
+        return self._path is not None
+
+    def rollover(self) -> None:
+        if self.rolled:
+            return
+
+        if self.spill_to == "memfd":
+            fd = os.memfd_create(f"spool{self.suffix}")
+            file = os.fdopen(fd, "w+b")
+            # another process (e.g. ffmpeg) can open it through the owner's fd table
+            path = f"/proc/{os.getpid()}/fd/{fd}"
+        else:
+            file = tempfile.NamedTemporaryFile(suffix=self.suffix)  # type: ignore
+            path = file.name
+
+        memory_file = self._file
+        position = memory_file.tell()
+        file.write(memory_file.getbuffer())  # type: ignore
+        file.seek(position)
+        self._file = file
+        self._path = path
+
+    def write(self, data: Union[bytes, bytearray, memoryview]) -> int:
+        size = self._file.write(data)
+        if not self.rolled and self._file.tell() > self.max_size:
+            self.rollover()
+        return size
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def readinto(self, buffer: Union[bytearray, memoryview]) -> int:
+        return self._file.readinto(buffer)  # type: ignore
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def fileno(self) -> int:
+        self.rollover()
+        return self._file.fileno()
+
+    def getvalue(self) -> bytes:
+        position = self._file.tell()
+        self._file.seek(0)
+        try:
+            return self._file.read()
+        finally:
+            self._file.seek(position)
+
+    def close(self) -> None:
+        self._file.close()
@@ -2,45 +2,204 @@ from __future__ import annotations
 
 __all__ = (
     "get_queue_url",
+    "get_queue_attributes",
+    "clear_queue_cache",
     "send_message",
     "delete_message",
     "receive_message",
     "change_message_visibility",
+    "SQSBatchProducer",
+    "SQSBatchAcknowledger",
+    "SQSConsumer",
 )
 
-from typing import Optional, Any
-
-import aiobotocore
-import botocore.client
+import asyncio
+import collections
+import functools
+import itertools
+import logging
+import random
+import time
+from types import TracebackType
+from typing import (
+    TYPE_CHECKING,
+    Optional,
+    Any,
+    Awaitable,
+    Callable,
+    NamedTuple,
+    Type,
+    TypeVar,
+)
 
+from lambda_utility.offload import SQS_PAYLOAD_LIMIT
 from lambda_utility.schema import (
+    SQSReceiveMessage,
     SQSReceiveMessageResponse,
     SQSSendMessageResponse,
 )
-from lambda_utility.session import create_client
+from lambda_utility.session import (
+    AioClientContext,
+    SharedClientContext,
+    pooled_client,
+)
+from lambda_utility.utils import to_client_error
+
+if TYPE_CHECKING:
+    import botocore.client
+
+    from lambda_utility.offload import PayloadOffload
+
+MAX_BATCH_ENTRIES = 10
+MAX_BATCH_SIZE = SQS_PAYLOAD_LIMIT
+DEFAULT_LINGER = 0.05
+DEFAULT_RETRIES = 2
+DEFAULT_VISIBILITY_TIMEOUT = 30
+DEFAULT_WAIT_TIME_SECONDS = 20
+DEFAULT_CONCURRENCY = 10
+DEFAULT_RECEIVERS = 2
+THROUGHPUT_WINDOW = 60.0
+MAX_RECEIVE_BACKOFF = 20.0
+DEFAULT_QUEUE_CACHE_TTL = 300.0
+DEFAULT_NEGATIVE_CACHE_TTL = 30.0
+
+logger = logging.getLogger(__file__)
 
 
 def remove_none(**kwargs: Any) -> dict:
     return {key: value for key, value in kwargs.items() if value is not None}
 
 
+T = TypeVar("T")
+
+# process-wide, so warm invocations skip the lookups
+_queue_cache: dict[tuple, tuple[float, Any]] = {}
+
+
+def clear_queue_cache() -> None:
+    _queue_cache.clear()
+
+
+class _CachedError(NamedTuple):
+    """A cached `QueueDoesNotExist`, raised anew on each hit so that
+    tracebacks do not pile up on one exception"""
+
+    response: dict
+    operation_name: str
+
+
+async def _get_access_key_id(client_obj: Any) -> Optional[str]:
+    # botocore keeps the credentials of a client on its request signer only
+    credentials = client_obj._request_signer._credentials
+    if credentials is None:
+        return None
+
+    frozen_credentials = await credentials.get_frozen_credentials()
+    return frozen_credentials.access_key
+
+
+async def _get_cached(
+    client_obj: Any,
+    key: tuple,
+    fetch: Callable[[], Awaitable[T]],
+    ttl: float,
+    negative_ttl: float,
+) -> T:
+    # queues of another region, endpoint or account may share the name
+    key = (
+        client_obj.meta.region_name,
+        client_obj.meta.endpoint_url,
+        await _get_access_key_id(client_obj),
+        *key,
+    )
+    now = time.monotonic()
+    cached = _queue_cache.get(key)
+    if cached is not None and cached[0] > now:
+        if isinstance(cached[1], _CachedError):
+            raise client_obj.exceptions.QueueDoesNotExist(*cached[1])
+        return cached[1]
+
+    try:
+        value = await fetch()
+    except client_obj.exceptions.QueueDoesNotExist as e:
+        if negative_ttl > 0:
+            _queue_cache[key] = (
+                now + negative_ttl,
+                _CachedError(e.response, e.operation_name),
+            )
+        raise
+
+    if ttl > 0:
+        _queue_cache[key] = (now + ttl, value)
+    return value
+
+
 async def get_queue_url(
     queue_name: str,
     *,
-    client: Optional[aiobotocore.session.ClientCreatorContext] = None,
+    client: Optional[AioClientContext] = None,
     config: Optional[botocore.client.Config] = None,
+    ttl: float = DEFAULT_QUEUE_CACHE_TTL,
+    negative_ttl: float = DEFAULT_NEGATIVE_CACHE_TTL,
 ) -> str:
     """Returns the URL of an existing Amazon SQS queue.
+    The URL is cached for `ttl` seconds and a missing queue for `negative_ttl` seconds.
 
     :ref: https://botocore.amazonaws.com/v1/documentation/api/latest/reference/services/sqs.html?highlight=sqs#SQS.Client.get_queue_url
     :exception: SQS.Client.exceptions.QueueDoesNotExist
     """
     if client is None:
-        client = create_client("sqs", config=config)
+        client = pooled_client("sqs", config=config)
+
+    async with client as client_obj:
+
+        async def fetch() -> str:
+            response = await client_obj.get_queue_url(QueueName=queue_name)
+            return response["QueueUrl"]
+
+        return await _get_cached(
+            client_obj, ("url", queue_name), fetch, ttl, negative_ttl
+        )
+
+
+async def get_queue_attributes(
+    queue_url: str,
+    *,
+    client: Optional[AioClientContext] = None,
+    config: Optional[botocore.client.Config] = None,
+    ttl: float = DEFAULT_QUEUE_CACHE_TTL,
+    negative_ttl: float = DEFAULT_NEGATIVE_CACHE_TTL,
+) -> dict[str, str]:
+    """Returns every attribute of a queue (URL or name), cached for `ttl` seconds.
+    Meant for the static attributes such as `FifoQueue` and `VisibilityTimeout`;
+    use `ttl=0` for the approximate message counts.
+
+    :ref: https://botocore.amazonaws.com/v1/documentation/api/latest/reference/services/sqs.html#SQS.Client.get_queue_attributes
+    :exception: SQS.Client.exceptions.QueueDoesNotExist
+    """
+    if client is None:
+        client = pooled_client("sqs", config=config)
 
     async with client as client_obj:
-        response = await client_obj.get_queue_url(QueueName=queue_name)
-        return response["QueueUrl"]
+        queue_url = await _resolve_queue_url(client_obj, queue_url)
+
+        async def fetch() -> dict[str, str]:
+            response = await client_obj.get_queue_attributes(
+                QueueUrl=queue_url, AttributeNames=["All"]
+            )
+            return response["Attributes"]
+
+        return await _get_cached(
+            client_obj, ("attributes", queue_url), fetch, ttl, negative_ttl
+        )
+
+
+async def _resolve_queue_url(client_obj: Any, queue: str) -> str:
+    """Returns the URL of a queue given by its URL or name"""
+    if queue.startswith(("https://", "http://")):
+        return queue
+
+    return await get_queue_url(queue, client=SharedClientContext(client_obj))
 
 
 async def send_message(
@@ -52,19 +211,30 @@ async def send_message(
     message_system_attributes: Optional[dict] = None,
     message_deduplication_id: Optional[str] = None,
     message_group_id: Optional[str] = None,
-    client: Optional[aiobotocore.session.ClientCreatorContext] = None,
+    client: Optional[AioClientContext] = None,
     config: Optional[botocore.client.Config] = None,
+    offload: Optional[PayloadOffload] = None,
 ) -> SQSSendMessageResponse:
     """Delivers a message to the specified queue.
+    With `offload`, a large body is compressed or moved to S3 (see `PayloadOffload`).
 
     :ref: https://botocore.amazonaws.com/v1/documentation/api/latest/reference/services/sqs.html?highlight=sqs#SQS.Client.send_message
     :exception: SQS.Client.exceptions.InvalidMessageContents
     :exception: SQS.Client.exceptions.UnsupportedOperation
     """
     if client is None:
-        client = create_client("sqs", config=config)
+        client = pooled_client("sqs", config=config)
+
+    if offload is not None:
+        message_body = (
+            await offload.encode(
+                message_body,
+                SQS_PAYLOAD_LIMIT - _get_message_size("", message_attributes),
+            )
+        ).decode()
 
     async with client as client_obj:
+        queue_url = await _resolve_queue_url(client_obj, queue_url)
         result = await client_obj.send_message(
             **remove_none(
                 QueueUrl=queue_url,
@@ -84,7 +254,7 @@ async def delete_message(
     queue_url: str,
     receipt_handle: str,
     *,
-    client: Optional[aiobotocore.session.ClientCreatorContext] = None,
+    client: Optional[AioClientContext] = None,
     config: Optional[botocore.client.Config] = None,
 ) -> None:
     """Deletes the specified message from the specified queue.
@@ -94,9 +264,10 @@ async def delete_message(
     :exception: SQS.Client.exceptions.ReceiptHandleIsInvalid
     """
     if client is None:
-        client = create_client("sqs", config=config)
+        client = pooled_client("sqs", config=config)
 
     async with client as client_obj:
+        queue_url = await _resolve_queue_url(client_obj, queue_url)
         await client_obj.delete_message(
             QueueUrl=queue_url,
             ReceiptHandle=receipt_handle,
@@ -112,18 +283,22 @@ async def receive_message(
     wait_time_seconds: Optional[int] = None,
     receive_request_attempt_id: Optional[str] = None,
     *,
-    client: Optional[aiobotocore.session.ClientCreatorContext] = None,
+    client: Optional[AioClientContext] = None,
     config: Optional[botocore.client.Config] = None,
+    offload: Optional[PayloadOffload] = None,
 ) -> SQSReceiveMessageResponse:
     """Retrieves one or more messages (up to 10), from the specified queue.
+    With `offload`, the bodies sent through `PayloadOffload` are restored on
+    access with `SQSReceiveMessage.read_body`.
 
     :ref: https://botocore.amazonaws.com/v1/documentation/api/latest/reference/services/sqs.html?highlight=sqs#SQS.Client.receive_message
     :exception: SQS.Client.exceptions.OverLimit
     """
     if client is None:
-        client = create_client("sqs", config=config)
+        client = pooled_client("sqs", config=config)
 
     async with client as client_obj:
+        queue_url = await _resolve_queue_url(client_obj, queue_url)
         result = await client_obj.receive_message(
             **remove_none(
                 QueueUrl=queue_url,
@@ -135,7 +310,13 @@ async def receive_message(
                 ReceiveRequestAttemptId=receive_request_attempt_id,
             ),
         )
-        return SQSReceiveMessageResponse(**result)
+
+    response = SQSReceiveMessageResponse(**result)
+    if offload is not None:
+        for message in response.messages:
+            message._offload = offload
+
+    return response
 
 
 async def change_message_visibility(
@@ -143,7 +324,7 @@ async def change_message_visibility(
     receipt_handle: str,
     visibility_timeout: int,
     *,
-    client: Optional[aiobotocore.session.ClientCreatorContext] = None,
+    client: Optional[AioClientContext] = None,
     config: Optional[botocore.client.Config] = None,
 ) -> None:
     """Changes the visibility timeout of a specified message in a queue to a new value.
@@ -153,11 +334,539 @@ async def change_message_visibility(
     :exception: SQS.Client.exceptions.ReceiptHandleIsInvalid
     """
     if client is None:
-        client = create_client("sqs", config=config)
+        client = pooled_client("sqs", config=config)
 
     async with client as client_obj:
+        queue_url = await _resolve_queue_url(client_obj, queue_url)
         await client_obj.change_message_visibility(
             QueueUrl=queue_url,
             ReceiptHandle=receipt_handle,
             VisibilityTimeout=visibility_timeout,
         )
+
+
+def _get_message_size(body: str, message_attributes: Optional[dict]) -> int:
+    """Returns the size SQS counts against the payload limit"""
+    size = len(body.encode())
+    for name, attribute in (message_attributes or {}).items():
+        size += len(name.encode()) + len(attribute.get("DataType", "").encode())
+        if "StringValue" in attribute:
+            size += len(attribute["StringValue"].encode())
+        if "BinaryValue" in attribute:
+            size += len(attribute["BinaryValue"])
+    return size
+
+
+class _PendingEntry(NamedTuple):
+    entry: dict
+    size: int
+    future: asyncio.Future
+
+
+class _SQSBatcher:
+    """Buffers the entries of a batch operation per queue and sends them
+    10 at a time, at the latest `linger` seconds after the first one.
+    """
+
+    __slots__ = (
+        "client",
+        "linger",
+        "retries",
+        "_buffers",
+        "_timers",
+        "_tasks",
+        "_tails",
+    )
+    client: AioClientContext
+    linger: float
+    retries: int
+    _buffers: dict[tuple[str, str], list[_PendingEntry]]
+    _timers: dict[tuple[str, str], asyncio.TimerHandle]
+    _tasks: set[asyncio.Future]
+    _tails: dict[tuple[str, str], asyncio.Future]
+
+    def __init__(
+        self,
+        *,
+        client: Optional[AioClientContext] = None,
+        config: Optional[botocore.client.Config] = None,
+        linger: float = DEFAULT_LINGER,
+        retries: int = DEFAULT_RETRIES,
+    ):
+        if client is None:
+            client = pooled_client("sqs", config=config)
+
+        self.client = client
+        self.linger = linger
+        self.retries = retries
+        self._buffers = {}
+        self._timers = {}
+        self._tasks = set()
+        self._tails = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Sends every buffered entry and waits for the batches in flight."""
+        for key in list(self._buffers):
+            self._flush_buffer(key)
+
+        while self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    def _add(
+        self, operation_name: str, queue_url: str, entry: dict, size: int = 0
+    ) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        key = (operation_name, queue_url)
+        pending = _PendingEntry(entry, size, loop.create_future())
+
+        buffer = self._buffers.get(key, [])
+        if buffer and sum(p.size for p in buffer) + pending.size > MAX_BATCH_SIZE:
+            self._flush_buffer(key)
+
+        buffer = self._buffers.setdefault(key, [])
+        buffer.append(pending)
+        if len(buffer) >= MAX_BATCH_ENTRIES:
+            self._flush_buffer(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.linger, self._flush_buffer, key)
+
+        return pending.future
+
+    def _flush_buffer(self, key: tuple[str, str]) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        entries = self._buffers.pop(key, [])
+        if not entries:
+            return
+
+        ordered = self._is_ordered(key[1])
+        previous = self._tails.get(key) if ordered else None
+        task = asyncio.ensure_future(self._send_batch(key, entries, previous))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        if ordered:
+            self._tails[key] = task
+            task.add_done_callback(functools.partial(self._drop_tail, key))
+
+    def _drop_tail(self, key: tuple[str, str], task: asyncio.Future) -> None:
+        if self._tails.get(key) is task:
+            del self._tails[key]
+
+    def _is_ordered(self, queue_url: str) -> bool:
+        """Whether the batches of the queue must be sent one after another"""
+        return False
+
+    def _get_result(self, resp: dict, result: dict) -> Any:
+        return None
+
+    async def _send_batch(
+        self,
+        key: tuple[str, str],
+        entries: list[_PendingEntry],
+        previous: Optional[asyncio.Future] = None,
+    ) -> None:
+        # failures are delivered through the futures, never raised here
+        method_name, queue_url = key
+        if previous is not None:
+            # the failed entries of the previous batch are resent before these
+            await asyncio.wait([previous])
+
+        try:
+            async with self.client as client_obj:
+                queue_url = await _resolve_queue_url(client_obj, queue_url)
+                method = getattr(client_obj, method_name)
+                operation_name = client_obj.meta.method_to_api_mapping[method_name]
+                for attempt in itertools.count():
+                    resp = await method(
+                        QueueUrl=queue_url,
+                        Entries=[
+                            {"Id": str(i), **pending.entry}
+                            for i, pending in enumerate(entries)
+                        ],
+                    )
+                    for result in resp.get("Successful", []):
+                        future = entries[int(result["Id"])].future
+                        if not future.done():
+                            future.set_result(self._get_result(resp, result))
+
+                    failed_entries: list[_PendingEntry] = []
+                    for failure in resp.get("Failed", []):
+                        pending = entries[int(failure["Id"])]
+                        if not failure["SenderFault"] and attempt < self.retries:
+                            failed_entries.append(pending)
+                        elif not pending.future.done():
+                            pending.future.set_exception(
+                                to_client_error(failure, operation_name)
+                            )
+
+                    if not failed_entries:
+                        return
+
+                    entries = failed_entries
+                    await asyncio.sleep(0.1 * (1 << attempt))
+        except Exception as e:
+            for pending in entries:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+
+
+class SQSBatchProducer(_SQSBatcher):
+    """Sends messages with `send_message_batch` instead of one request per message.
+
+    Messages are buffered per queue and a batch is sent when it holds 10
+    messages, when the next message would exceed the 256 KB payload limit,
+    or `linger` seconds after its first message. Entries failing on the
+    server side are sent again, up to `retries` times. The batches of a FIFO
+    queue are sent one at a time, so the order of a message group is kept.
+    `send` returns a future resolving to the `SQSSendMessageResponse` of the
+    message; leaving the block sends the rest and waits for every batch.
+    :example:
+        async with SQSBatchProducer() as producer:
+            futures = [producer.send(queue_url, body) for body in bodies]
+        responses = [future.result() for future in futures]
+
+    :ref: https://botocore.amazonaws.com/v1/documentation/api/latest/reference/services/sqs.html#SQS.Client.send_message_batch
+    """
+
+    __slots__ = ()
+
+    def send(
+        self,
+        queue_url: str,
+        message_body: str,
+        *,
+        delay_seconds: Optional[int] = None,
+        message_attributes: Optional[dict] = None,
+        message_system_attributes: Optional[dict] = None,
+        message_deduplication_id: Optional[str] = None,
+        message_group_id: Optional[str] = None,
+    ) -> asyncio.Future[SQSSendMessageResponse]:
+        """Buffers a message, see `send_message` for arguments."""
+        entry = remove_none(
+            MessageBody=message_body,
+            DelaySeconds=delay_seconds,
+            MessageAttributes=message_attributes,
+            MessageSystemAttributes=message_system_attributes,
+            MessageDeduplicationId=message_deduplication_id,
+            MessageGroupId=message_group_id,
+        )
+        size = _get_message_size(message_body, message_attributes)
+        return self._add("send_message_batch", queue_url, entry, size)
+
+    def _is_ordered(self, queue_url: str) -> bool:
+        return queue_url.endswith(".fifo")
+
+    def _get_result(self, resp: dict, result: dict) -> SQSSendMessageResponse:
+        return SQSSendMessageResponse(
+            response_metadata=resp["ResponseMetadata"], **result
+        )
+
+
+class SQSBatchAcknowledger(_SQSBatcher):
+    """Deletes messages and changes their visibility with `delete_message_batch`
+    and `change_message_visibility_batch` instead of one request per message.
+
+    Receipt handles from concurrent workers are collected per queue and sent
+    10 at a time, at the latest `linger` seconds after the first one.
+    Entries failing on the server side are sent again, up to `retries` times.
+    Each call returns a future resolving to None once the entry succeeded;
+    leaving the block (e.g. at the end of the handler) sends the rest.
+    :example:
+        async with SQSBatchAcknowledger() as acknowledger:
+            for message in response.messages:
+                acknowledger.delete(queue_url, message.receipt_handle)
+
+    :ref: https://botocore.amazonaws.com/v1/documentation/api/latest/reference/services/sqs.html#SQS.Client.delete_message_batch
+    :ref: https://botocore.amazonaws.com/v1/documentation/api/latest/reference/services/sqs.html#SQS.Client.change_message_visibility_batch
+    """
+
+    __slots__ = ()
+
+    def delete(self, queue_url: str, receipt_handle: str) -> asyncio.Future[None]:
+        return self._add(
+            "delete_message_batch", queue_url, {"ReceiptHandle": receipt_handle}
+        )
+
+    def change_visibility(
+        self, queue_url: str, receipt_handle: str, visibility_timeout: int
+    ) -> asyncio.Future[None]:
+        return self._add(
+            "change_message_visibility_batch",
+            queue_url,
+            {"ReceiptHandle": receipt_handle, "VisibilityTimeout": visibility_timeout},
+        )
+
+
+def _log_failure(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning("[SQSConsumer] %s", future.exception())
+
+
+class SQSConsumer:
+    """Long-polls a queue with `receivers` concurrent `receive_message` calls
+    over one client and runs `handler` on up to `concurrency` messages at a time.
+
+    A message is deleted (in batches) once its handler returns. Until then its
+    visibility timeout is extended every `visibility_timeout / 3` seconds, so a
+    slow handler never lets it be delivered twice; a failed message is left to
+    become visible again. `in_flight`, `throughput` and the counters show how
+    busy the consumer is, to tune `concurrency` and `receivers`.
+    A failed `receive_message` (e.g. throttling) is retried with a backoff of up
+    to `MAX_RECEIVE_BACKOFF` seconds; only a missing queue ends `run`.
+    :example:
+        consumer = SQSConsumer(queue_url, handle_message, concurrency=20)
+        asyncio.get_event_loop().call_later(600, consumer.stop)
+        await consumer.run()
+
+    :ref: https://docs.aws.amazon.com/AWSSimpleQueueService/latest/SQSDeveloperGuide/sqs-visibility-timeout.html
+    """
+
+    __slots__ = (
+        "queue_url",
+        "handler",
+        "client",
+        "concurrency",
+        "receivers",
+        "visibility_timeout",
+        "wait_time_seconds",
+        "offload",
+        "received",
+        "succeeded",
+        "failed",
+        "_deadlines",
+        "_reserved",
+        "_tasks",
+        "_completed_at",
+        "_started_at",
+        "_capacity",
+        "_stopping",
+        "_stop_requested",
+        "_acknowledger",
+    )
+    queue_url: str
+    handler: Callable[[SQSReceiveMessage], Awaitable[Any]]
+    client: AioClientContext
+    concurrency: int
+    receivers: int
+    visibility_timeout: int
+    wait_time_seconds: int
+    offload: Optional[PayloadOffload]
+    received: int
+    succeeded: int
+    failed: int
+    _deadlines: dict[str, float]
+    _reserved: int
+    _tasks: set[asyncio.Future]
+    _completed_at: collections.deque[float]
+    _started_at: float
+    _capacity: asyncio.Condition
+    _stopping: Optional[asyncio.Event]
+    _stop_requested: bool
+    _acknowledger: SQSBatchAcknowledger
+
+    def __init__(
+        self,
+        queue_url: str,
+        handler: Callable[[SQSReceiveMessage], Awaitable[Any]],
+        *,
+        client: Optional[AioClientContext] = None,
+        config: Optional[botocore.client.Config] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        receivers: int = DEFAULT_RECEIVERS,
+        visibility_timeout: int = DEFAULT_VISIBILITY_TIMEOUT,
+        wait_time_seconds: int = DEFAULT_WAIT_TIME_SECONDS,
+        offload: Optional[PayloadOffload] = None,
+    ):
+        if client is None:
+            client = pooled_client("sqs", config=config)
+
+        self.queue_url = queue_url
+        self.handler = handler
+        self.client = client
+        self.concurrency = concurrency
+        self.receivers = receivers
+        self.visibility_timeout = visibility_timeout
+        self.wait_time_seconds = wait_time_seconds
+        self.offload = offload
+        self.received = 0
+        self.succeeded = 0
+        self.failed = 0
+        self._deadlines = {}
+        self._reserved = 0
+        self._tasks = set()
+        self._completed_at = collections.deque()
+        self._started_at = time.monotonic()
+        # the event is bound to the loop of `run`, so it is created there
+        self._stopping = None
+        self._stop_requested = False
+
+    @property
+    def in_flight(self) -> int:
+        """Number of messages received and not handled yet"""
+        return len(self._deadlines)
+
+    @property
+    def throughput(self) -> float:
+        """Handled messages per second over the last minute"""
+        now = time.monotonic()
+        self._prune_completions(now)
+        elapsed = min(now - self._started_at, THROUGHPUT_WINDOW)
+        return len(self._completed_at) / elapsed if elapsed > 0 else 0.0
+
+    def stop(self) -> None:
+        """Stops receiving; `run` returns once the messages in flight are handled.
+        Called before `run`, it makes `run` return right away.
+        """
+        self._stop_requested = True
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def run(self) -> None:
+        self._capacity = asyncio.Condition()
+        self._stopping = asyncio.Event()
+        if self._stop_requested:
+            self._stopping.set()
+        self._started_at = time.monotonic()
+
+        try:
+            await self._run(self._stopping)
+        finally:
+            self._stopping = None
+            self._stop_requested = False
+
+    async def _run(self, stopping_event: asyncio.Event) -> None:
+        async with self.client as client_obj:
+            self.queue_url = await _resolve_queue_url(client_obj, self.queue_url)
+            shared_client = SharedClientContext(client_obj)
+            async with SQSBatchAcknowledger(client=shared_client) as acknowledger:
+                self._acknowledger = acknowledger
+                receivers = [
+                    asyncio.ensure_future(self._receive(client_obj))
+                    for _ in range(self.receivers)
+                ]
+                heartbeat = asyncio.ensure_future(self._heartbeat())
+                stopping = asyncio.ensure_future(stopping_event.wait())
+                try:
+                    # a receiver only returns by raising QueueDoesNotExist
+                    await asyncio.wait(
+                        [stopping, *receivers], return_when=asyncio.FIRST_COMPLETED
+                    )
+                finally:
+                    for task in (stopping, *receivers):
+                        task.cancel()
+                    results = await asyncio.gather(*receivers, return_exceptions=True)
+                    # handlers keep their messages visible until they are done
+                    await asyncio.gather(*self._tasks, return_exceptions=True)
+                    heartbeat.cancel()
+
+                for result in results:
+                    if isinstance(result, Exception):
+                        raise result
+
+    async def _receive(self, client_obj: Any) -> None:
+        client = SharedClientContext(client_obj)
+        failures = 0
+        while True:
+            async with self._capacity:
+                await self._capacity.wait_for(
+                    lambda: self.in_flight + self._reserved < self.concurrency
+                )
+                # slots are reserved so concurrent receivers do not overfill
+                count = min(
+                    MAX_BATCH_ENTRIES,
+                    self.concurrency - self.in_flight - self._reserved,
+                )
+                self._reserved += count
+
+            try:
+                resp = await receive_message(
+                    self.queue_url,
+                    attribute_names=["All"],
+                    message_attribute_names=["All"],
+                    max_number_of_messages=count,
+                    visibility_timeout=self.visibility_timeout,
+                    wait_time_seconds=self.wait_time_seconds,
+                    client=client,
+                    offload=self.offload,
+                )
+            except client_obj.exceptions.QueueDoesNotExist:
+                raise
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning(
+                    "[SQSConsumer] failed to receive messages", exc_info=True
+                )
+                resp = None
+            finally:
+                self._reserved -= count
+
+            if resp is None:
+                failures += 1
+                # jittered, so that the receivers do not retry in lockstep
+                backoff = min(MAX_RECEIVE_BACKOFF, 0.1 * (1 << min(failures, 8)))
+                await asyncio.sleep(random.uniform(0, backoff))
+                continue
+            failures = 0
+
+            now = time.monotonic()
+            for message in resp.messages:
+                self.received += 1
+                self._deadlines[message.receipt_handle] = now + self.visibility_timeout
+                task = asyncio.ensure_future(self._handle(message))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+            async with self._capacity:
+                self._capacity.notify_all()
+
+    async def _handle(self, message: SQSReceiveMessage) -> None:
+        try:
+            await self.handler(message)
+        except Exception:
+            self.failed += 1
+            logger.exception(
+                "[SQSConsumer] failed to handle message %r", message.message_id
+            )
+        else:
+            self.succeeded += 1
+            future = self._acknowledger.delete(self.queue_url, message.receipt_handle)
+            future.add_done_callback(_log_failure)
+        finally:
+            del self._deadlines[message.receipt_handle]
+            now = time.monotonic()
+            self._completed_at.append(now)
+            self._prune_completions(now)
+            async with self._capacity:
+                self._capacity.notify_all()
+
+    async def _heartbeat(self) -> None:
+        interval = self.visibility_timeout / 3
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for receipt_handle, deadline in list(self._deadlines.items()):
+                # extended while at least one more beat fits before it expires
+                if deadline - now <= 2 * interval:
+                    self._deadlines[receipt_handle] = now + self.visibility_timeout
+                    future = self._acknowledger.change_visibility(
+                        self.queue_url, receipt_handle, self.visibility_timeout
+                    )
+                    future.add_done_callback(_log_failure)
+
+    def _prune_completions(self, now: float) -> None:
+        while self._completed_at and now - self._completed_at[0] > THROUGHPUT_WINDOW:
+            self._completed_at.popleft()
@@ -5,10 +5,11 @@ __all__ = (
     "CognitoIdentity",
     "ClientContext",
     "LambdaContext",
+    "AsyncWritable",
 )
 
 import pathlib
-from typing import Union, Protocol, Optional
+from typing import Union, Protocol, Optional, Any
 
 PathLike = Union[str, pathlib.PurePath]
 
@@ -41,3 +42,9 @@ class LambdaContext(Protocol):
 
     def get_remaining_time_in_millis(self) -> int:
         ...
+
+
+class AsyncWritable(Protocol):
+    # like `lambda_utility.s3storage.UploadStream`
+    async def write(self, data: bytes) -> Any:
+        ...
@@ -6,17 +6,43 @@ __all__ = (
     "round_number",
     "LambdaRuntimeError",
     "exception_handler",
+    "sqs_batch_handler",
+    "to_async_iterator",
+    "batched",
+    "concurrent_map",
+    "to_client_error",
 )
 
+import asyncio
 import contextlib
 import decimal
 import functools
+import logging
 import time
 import traceback
-from typing import TypeVar, Any, cast, Optional, Callable, Literal
+from typing import (
+    TYPE_CHECKING,
+    TypeVar,
+    Any,
+    cast,
+    Optional,
+    Callable,
+    Literal,
+    Awaitable,
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    Union,
+)
 
 from lambda_utility.typedefs import LambdaContext
 
+if TYPE_CHECKING:
+    from lambda_utility.offload import PayloadOffload
+    from lambda_utility.schema import SQSReceiveMessage
+
+logger = logging.getLogger(__file__)
+
 
 @contextlib.contextmanager
 def timeit_ctx_manager(
@@ -90,3 +116,189 @@ def exception_handler(func: LambdaHandlerT) -> LambdaHandlerT:
             ) from e
 
     return cast(LambdaHandlerT, wrapper)
+
+
+def _parse_sqs_record(
+    record: dict[str, Any], offload: Optional[PayloadOffload] = None
+) -> SQSReceiveMessage:
+    from lambda_utility.schema import SQSReceiveMessage
+
+    # the records of an event source are camelCased unlike `receive_message`;
+    # fields with an explicit alias are passed by it
+    message = SQSReceiveMessage(
+        message_id=record["messageId"],
+        receipt_handle=record["receiptHandle"],
+        MD5OfBody=record["md5OfBody"],
+        body=record["body"],
+        attributes=record.get("attributes"),
+        MD5OfMessageAttributes=record.get("md5OfMessageAttributes"),
+        message_attributes=record.get("messageAttributes"),
+    )
+    message._offload = offload
+    return message
+
+
+def sqs_batch_handler(
+    *,
+    concurrency: int = 10,
+    preserve_group_order: bool = True,
+    offload: Optional[PayloadOffload] = None,
+) -> Callable[
+    [Callable[[SQSReceiveMessage, LambdaContext], Awaitable[Any]]],
+    Callable[[dict, LambdaContext], dict],
+]:
+    """Turns an async handler of one SQS message into the handler of an SQS
+    event source that processes up to `concurrency` records at a time.
+
+    A failed record is logged and reported in `batchItemFailures`, so only the
+    failed records are delivered again (enable `ReportBatchItemFailures` on
+    the event source mapping). With `preserve_group_order`, the records of a
+    FIFO `MessageGroupId` run one after another and the records following a
+    failure in the group are reported as failed without running.
+    With `offload`, the bodies sent through `PayloadOffload` are restored on
+    access with `SQSReceiveMessage.read_body`.
+    The event loop is kept across invocations, so pooled clients are reused.
+    :example:
+        @sqs_batch_handler(concurrency=50)
+        async def handler(message: SQSReceiveMessage, context: LambdaContext) -> None:
+            body = await message.read_body()
+
+    ref: https://docs.aws.amazon.com/lambda/latest/dg/with-sqs.html#services-sqs-batchfailurereporting
+    """
+
+    def decorator(
+        func: Callable[[SQSReceiveMessage, LambdaContext], Awaitable[Any]],
+    ) -> Callable[[dict, LambdaContext], dict]:
+        loop: Optional[asyncio.AbstractEventLoop] = None
+
+        async def process_group(
+            messages: list[SQSReceiveMessage], context: LambdaContext
+        ) -> list[str]:
+            for i, message in enumerate(messages):
+                try:
+                    await func(message, context)
+                except Exception:
+                    logger.exception(
+                        "[SQS] failed to process message %r", message.message_id
+                    )
+                    return [m.message_id for m in messages[i:]]
+            return []
+
+        async def process(event: dict, context: LambdaContext) -> dict:
+            groups: dict[Any, list[SQSReceiveMessage]] = {}
+            for i, record in enumerate(event["Records"]):
+                message = _parse_sqs_record(record, offload)
+                group_id = (message.attributes or {}).get("MessageGroupId")
+                if not preserve_group_order or group_id is None:
+                    group_id = i
+                groups.setdefault(group_id, []).append(message)
+
+            failures: list[dict[str, str]] = []
+            async for failed_ids in concurrent_map(
+                lambda messages: process_group(messages, context),
+                groups.values(),
+                concurrency=concurrency,
+            ):
+                failures.extend({"itemIdentifier": i} for i in failed_ids)
+
+            return {"batchItemFailures": failures}
+
+        @functools.wraps(func)
+        def wrapper(event: dict, context: LambdaContext) -> dict:
+            nonlocal loop
+            if loop is None or loop.is_closed():
+                loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(loop)
+            return loop.run_until_complete(process(event, context))
+
+        return wrapper
+
+    return decorator
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def to_async_iterator(
+    items: Union[Iterable[T], AsyncIterable[T]],
+) -> AsyncIterator[T]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def batched(
+    items: Union[Iterable[T], AsyncIterable[T]], size: int
+) -> AsyncIterator[list[T]]:
+    """Yields lists of up to `size` consecutive items"""
+    batch: list[T] = []
+    async for item in to_async_iterator(items):
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+async def concurrent_map(
+    func: Callable[[T], Awaitable[R]],
+    items: Union[Iterable[T], AsyncIterable[T]],
+    *,
+    concurrency: int,
+) -> AsyncIterator[R]:
+    """Yields `func(item)` in completion order, running at most `concurrency` at a time.
+
+    Items are pulled lazily, so `items` may be endless or an async generator.
+    An exception raised by `func` is propagated and cancels the pending calls.
+    """
+    iterator = to_async_iterator(items)
+    pending: set[asyncio.Future] = set()
+    next_item: Optional[asyncio.Future] = None
+    exhausted = False
+    try:
+        while True:
+            # the next item is awaited alongside the running calls,
+            # so a slow source does not hold back finished results
+            if next_item is None and not exhausted and len(pending) < concurrency:
+                next_item = asyncio.ensure_future(iterator.__anext__())
+
+            waiting = pending if next_item is None else pending | {next_item}
+            if not waiting:
+                break
+
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            if next_item is not None and next_item in done:
+                done.discard(next_item)
+                try:
+                    item = next_item.result()
+                except StopAsyncIteration:
+                    exhausted = True
+                else:
+                    pending.add(asyncio.ensure_future(func(item)))
+                next_item = None
+
+            pending -= done
+            for future in done:
+                yield future.result()
+    finally:
+        if next_item is not None:
+            pending.add(next_item)
+        for future in pending:
+            future.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+def to_client_error(error: dict[str, Any], operation_name: str) -> Exception:
+    """Returns the `ClientError` for an entry that failed in a batch operation"""
+    import botocore.exceptions
+
+    return botocore.exceptions.ClientError(
+        {"Error": {"Code": error.get("Code"), "Message": error.get("Message")}},
+        operation_name,
+    )
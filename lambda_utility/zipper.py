@@ -2,20 +2,54 @@ from __future__ import annotations
 
 __all__ = (
     "Unzip",
+    "RemoteUnzip",
+    "Zip",
     "is_image_sequence",
     "is_dot_file",
 )
 
+import asyncio
 import functools
 import io
 import re
+import struct
+import time
 import zipfile
 import pathlib
 from types import TracebackType
-from typing import Optional, Type, Union, BinaryIO, Iterable, Callable
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Optional,
+    Type,
+    Union,
+    BinaryIO,
+    Iterable,
+    Callable,
+    AsyncIterable,
+)
 
 from lambda_utility.path import PathExt
-from lambda_utility.typedefs import PathLike
+from lambda_utility.session import AioClientContext, pooled_client
+from lambda_utility.typedefs import PathLike, AsyncWritable
+from lambda_utility.utils import concurrent_map, to_async_iterator
+
+if TYPE_CHECKING:
+    import aiobotocore
+    import botocore.client
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_CONCURRENCY = 8
+
+# ref: https://pkware.cachefly.net/webdocs/casestudies/APPNOTE.TXT (4.3.14 - 4.3.16)
+_EOCD = struct.Struct("<4s4H2LH")
+_EOCD_SIGNATURE = b"PK\x05\x06"
+_ZIP64_EOCD = struct.Struct("<4sQ2H2L4Q")
+_ZIP64_LOCATOR_SIZE = 20
+_ZIP64_LOCATOR_SIGNATURE = b"PK\x06\x07"
+# the longest possible comment after the (zip64) end of central directory records
+TAIL_SIZE = 0xFFFF + _EOCD.size + _ZIP64_LOCATOR_SIZE + _ZIP64_EOCD.size
 
 
 class Unzip:
@@ -141,7 +175,7 @@ class Unzip:
 
     def get_sequence_names(self, extension: str) -> tuple[str, ...]:
         extension = extension.lstrip(".")
-        pattern = re.compile(fr"(\d+)(\.{extension})$", flags=re.IGNORECASE)
+        pattern = re.compile(rf"(\d+)(\.{extension})$", flags=re.IGNORECASE)
 
         sequence_names: dict[int, str] = {}
 
@@ -162,6 +196,425 @@ class Unzip:
         return tuple(name for _, name in sorted_result)
 
 
+class _RangeReader(io.RawIOBase):
+    """Seekable file object over the byte ranges of a remote file fetched so far"""
+
+    def __init__(self, size: int):
+        self._size = size
+        self._position = 0
+        self._segments: dict[int, bytes] = {}
+
+    def add(self, offset: int, data: bytes) -> None:
+        # replaced rather than mutated, readers run in executor threads
+        self._segments = {**self._segments, offset: data}
+
+    def discard(self, offset: int) -> None:
+        self._segments = {k: v for k, v in self._segments.items() if k != offset}
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+
+        if offset < 0:
+            raise OSError(f"negative seek position {offset}")
+
+        self._position = offset
+        return offset
+
+    def readinto(self, buffer: Any) -> int:
+        view = memoryview(buffer).cast("B")
+        end = min(self._position + len(view), self._size)
+        read = 0
+        while self._position < end:
+            offset, segment = self._find_segment(self._position)
+            start = self._position - offset
+            size = min(len(segment) - start, end - self._position)
+            view[read : read + size] = memoryview(segment)[start : start + size]
+            read += size
+            self._position += size
+        return read
+
+    def _find_segment(self, position: int) -> tuple[int, bytes]:
+        for offset, segment in self._segments.items():
+            if offset <= position < offset + len(segment):
+                return offset, segment
+        raise ValueError(f"byte {position} has not been fetched")
+
+
+def _find_central_directory(tail: bytes) -> int:
+    """Returns the offset of the central directory relative to the start of `tail`,
+    which may be negative when the directory does not fit in `tail`.
+    """
+    position = tail.rfind(_EOCD_SIGNATURE)
+    if position < 0 or len(tail) - position < _EOCD.size:
+        raise zipfile.BadZipFile("File is not a zip file")
+
+    *_, size_cd, _, _ = _EOCD.unpack_from(tail, position)
+    locator = position - _ZIP64_LOCATOR_SIZE
+    if locator >= 0 and tail[locator : locator + 4] == _ZIP64_LOCATOR_SIGNATURE:
+        # zipfile also expects the zip64 record right before its locator
+        position = locator - _ZIP64_EOCD.size
+        if position < 0:
+            raise zipfile.BadZipFile("Corrupt zip64 end of central directory")
+        size_cd = _ZIP64_EOCD.unpack_from(tail, position)[8]
+
+    return position - size_cd
+
+
+class RemoteUnzip(Unzip):
+    """`Unzip` over a zip archive in S3 that is never downloaded as a whole.
+
+    The central directory is read with range requests on entering, so
+    `includes`, `excludes` and `get_sequence_names` work as usual, and only
+    the byte ranges of the selected members are fetched (concurrently) on
+    extraction. Time and egress scale with what is extracted, not with the
+    size of the archive.
+    :example:
+        async with RemoteUnzip(bucket, "frames.zip") as unzip:
+            names = unzip.get_sequence_names("png")[:20]
+            await unzip.download_all(path="/tmp/frames", files=names)
+    """
+
+    __slots__ = (
+        "bucket",
+        "key",
+        "client",
+        "max_concurrency",
+        "_reader",
+        "_e_tag",
+        "_member_ends",
+    )
+    bucket: str
+    key: PathLike
+    client: AioClientContext
+    max_concurrency: int
+    _reader: _RangeReader
+    _e_tag: str
+    _member_ends: dict[int, int]
+
+    def __init__(
+        self,
+        bucket: str,
+        key: PathLike,
+        *,
+        client: Optional[AioClientContext] = None,
+        config: Optional[botocore.client.Config] = None,
+        includes: Optional[
+            Iterable[Union[re.Pattern, Callable[[PathExt], bool]]]
+        ] = None,
+        excludes: Optional[
+            Iterable[Union[re.Pattern, Callable[[PathExt], bool]]]
+        ] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ):
+        super().__init__(f"s3://{bucket}/{key}", includes=includes, excludes=excludes)
+        self.bucket = bucket
+        self.key = key
+        if client is None:
+            client = pooled_client("s3", config=config)
+
+        self.client = client
+        self.max_concurrency = max_concurrency
+
+    def __enter__(self):
+        raise TypeError(f"use 'async with' with {type(self).__name__!r}")
+
+    def extract_all(
+        self,
+        *,
+        path: Optional[PathLike] = None,
+        files: Optional[Iterable[PathLike]] = None,
+        pwd: Optional[bytes] = None,
+    ) -> list[str]:
+        raise TypeError(f"use 'download_all' with {type(self).__name__!r}")
+
+    def extract_all_in_memory(
+        self,
+        files: Optional[Iterable[PathLike]] = None,
+        pwd: Optional[bytes] = None,
+    ) -> Iterable[tuple[str, bytes]]:
+        raise TypeError(f"use 'download_all_in_memory' with {type(self).__name__!r}")
+
+    async def __aenter__(self) -> RemoteUnzip:
+        async with self.client as client_obj:
+            resp = await client_obj.get_object(
+                Bucket=self.bucket, Key=str(self.key), Range=f"bytes=-{TAIL_SIZE}"
+            )
+            tail = await resp["Body"].read()
+            # every range must come from the same version of the object
+            self._e_tag = resp["ETag"]
+            if "ContentRange" in resp:
+                size = int(resp["ContentRange"].rsplit("/", 1)[1])
+            else:
+                size = len(tail)
+
+            tail_offset = size - len(tail)
+            cd_offset = tail_offset + _find_central_directory(tail)
+            if cd_offset < 0:
+                raise zipfile.BadZipFile("Bad offset for central directory")
+            if cd_offset < tail_offset:
+                head = await self._fetch_range(client_obj, cd_offset, tail_offset - 1)
+                tail = head + tail
+                tail_offset = cd_offset
+
+        self._reader = _RangeReader(size)
+        self._reader.add(tail_offset, tail)
+        self.zip_ref = zipfile.ZipFile(self._reader)
+        self._reader.discard(tail_offset)
+
+        # a member spans from its local header to the next one
+        offsets = sorted(info.header_offset for info in self.zip_ref.infolist())
+        self._member_ends = dict(zip(offsets, offsets[1:] + [cd_offset]))
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.zip_ref.close()
+
+    async def download_all(
+        self,
+        *,
+        path: Optional[PathLike] = None,
+        files: Optional[Iterable[PathLike]] = None,
+        pwd: Optional[bytes] = None,
+    ) -> list[str]:
+        """Same as `extract_all`, but fetches the members concurrently"""
+        if path is not None:
+            path = str(path)
+
+        if files is None:
+            files = self.get_valid_namelist()
+
+        members: list[str] = list(map(str, files))
+        extract = functools.partial(self.zip_ref.extract, path=path, pwd=pwd)
+        async for _ in self._map_members(extract, members):
+            pass
+        return members
+
+    async def download_all_in_memory(
+        self,
+        files: Optional[Iterable[PathLike]] = None,
+        pwd: Optional[bytes] = None,
+    ) -> AsyncIterator[tuple[str, bytes]]:
+        """Same as `extract_all_in_memory`, but yields members in the order they are fetched"""
+        if files is None:
+            files = self.get_valid_namelist()
+
+        read = functools.partial(self.zip_ref.read, pwd=pwd)
+        async for filename, data in self._map_members(read, map(str, files)):
+            yield filename, data
+
+    async def _map_members(
+        self,
+        func: Callable[[zipfile.ZipInfo], Any],
+        members: Iterable[str],
+    ) -> AsyncIterator[tuple[str, Any]]:
+        loop = asyncio.get_running_loop()
+
+        async def fetch_member(filename: str) -> tuple[str, Any]:
+            info = self.zip_ref.getinfo(filename)
+            start = info.header_offset
+            async with self.client as client_obj:
+                data = await self._fetch_range(
+                    client_obj, start, self._member_ends[start] - 1
+                )
+
+            self._reader.add(start, data)
+            try:
+                # decompression releases the GIL
+                return filename, await loop.run_in_executor(None, func, info)
+            finally:
+                self._reader.discard(start)
+
+        async for result in concurrent_map(
+            fetch_member, members, concurrency=self.max_concurrency
+        ):
+            yield result
+
+    async def _fetch_range(
+        self, client_obj: aiobotocore.client.AioBaseClient, start: int, end: int
+    ) -> bytes:
+        resp = await client_obj.get_object(
+            Bucket=self.bucket,
+            Key=str(self.key),
+            Range=f"bytes={start}-{end}",
+            IfMatch=self._e_tag,
+        )
+        return await resp["Body"].read()
+
+
+class _ZipBuffer:
+    """Non-seekable file object collecting the output of `zipfile.ZipFile`"""
+
+    __slots__ = ("_data",)
+
+    def __init__(self):
+        self._data = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._data += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = bytes(self._data)
+        self._data.clear()
+        return data
+
+
+class Zip:
+    """Writes a zip archive as a stream into `sink`, e.g. `s3storage.UploadStream`.
+
+    The archive is handed to the sink as it is compressed, so it is never
+    materialised on disk or in memory. Members are written one at a time.
+    :example:
+        async with s3storage.UploadStream(bucket, "out.zip") as stream:
+            async with Zip(stream) as zip_writer:
+                await zip_writer.write("meta.json", b"{}")
+                await zip_writer.write_file("001.png", "/tmp/001.png")
+    """
+
+    __slots__ = (
+        "sink",
+        "zip_ref",
+        "chunk_size",
+        "_buffer",
+        "_lock",
+    )
+    sink: AsyncWritable
+    zip_ref: zipfile.ZipFile
+    chunk_size: int
+
+    def __init__(
+        self,
+        sink: AsyncWritable,
+        *,
+        compression: int = zipfile.ZIP_DEFLATED,
+        compresslevel: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self.sink = sink
+        self.chunk_size = chunk_size
+        self._buffer = _ZipBuffer()
+        self.zip_ref = zipfile.ZipFile(
+            self._buffer,  # type: ignore
+            mode="w",
+            compression=compression,
+            compresslevel=compresslevel,
+        )
+
+    async def __aenter__(self) -> Zip:
+        self._lock = asyncio.Lock()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        # on failure the sink is left to discard the incomplete archive
+        if exc_type is None:
+            self.zip_ref.close()
+            await self._drain()
+
+    async def write(
+        self,
+        name: PathLike,
+        data: bytes,
+        *,
+        compress_type: Optional[int] = None,
+    ) -> None:
+        zinfo = self._make_info(name, compress_type)
+        zinfo.file_size = len(data)
+        view = memoryview(data)
+        chunks = (
+            view[start : start + self.chunk_size]
+            for start in range(0, len(view), self.chunk_size)
+        )
+        await self._write_member(zinfo, to_async_iterator(chunks))
+
+    async def write_file(
+        self,
+        name: PathLike,
+        path: PathLike,
+        *,
+        compress_type: Optional[int] = None,
+    ) -> None:
+        zinfo = zipfile.ZipInfo.from_file(path, arcname=str(name))
+        self._set_compression(zinfo, compress_type)
+        with open(path, "rb") as f:
+            chunks = iter(functools.partial(f.read, self.chunk_size), b"")
+            await self._write_member(zinfo, to_async_iterator(chunks))
+
+    async def write_stream(
+        self,
+        name: PathLike,
+        stream: AsyncIterable[bytes],
+        *,
+        compress_type: Optional[int] = None,
+    ) -> None:
+        zinfo = self._make_info(name, compress_type)
+        # the size is unknown until the stream ends
+        await self._write_member(zinfo, stream, force_zip64=True)
+
+    def _make_info(
+        self, name: PathLike, compress_type: Optional[int]
+    ) -> zipfile.ZipInfo:
+        zinfo = zipfile.ZipInfo(str(name), date_time=time.localtime()[:6])
+        zinfo.external_attr = 0o600 << 16  # same as `ZipFile.writestr`
+        self._set_compression(zinfo, compress_type)
+        return zinfo
+
+    def _set_compression(
+        self, zinfo: zipfile.ZipInfo, compress_type: Optional[int]
+    ) -> None:
+        zinfo.compress_type = (
+            compress_type if compress_type is not None else self.zip_ref.compression
+        )
+        zinfo._compresslevel = self.zip_ref.compresslevel  # type: ignore
+
+    async def _write_member(
+        self,
+        zinfo: zipfile.ZipInfo,
+        chunks: AsyncIterable[Union[bytes, memoryview]],
+        *,
+        force_zip64: bool = False,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            with self.zip_ref.open(zinfo, mode="w", force_zip64=force_zip64) as f:
+                async for chunk in chunks:
+                    # zlib releases the GIL, so compressing in a thread
+                    # overlaps with the sink uploading the previous output
+                    await loop.run_in_executor(None, f.write, chunk)
+                    await self._drain()
+
+            await self._drain()
+
+    async def _drain(self) -> None:
+        data = self._buffer.take()
+        if data:
+            await self.sink.write(data)
+
+
 def is_image_sequence(
     path: PathLike, *, allowed_extension: Optional[str] = None
 ) -> bool:
@@ -190,7 +643,7 @@ def is_image_sequence(
             )
         )
     else:
-        return bool(re.fullmatch(fr"^(.*_)?(\d+)\.({allowed_extension})$", path.name))
+        return bool(re.fullmatch(rf"^(.*_)?(\d+)\.({allowed_extension})$", path.name))
 
 
 def is_dot_file(path: PathLike) -> bool: